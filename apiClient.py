@@ -1,25 +1,27 @@
 import httpx
 
+# Shared by the sign-in calls so re-authenticating reuses open connections
+_SYNC = httpx.Client(timeout=10)
+
 
 def _get_session(identifier: str, password: str) -> tuple[str, str] | None:
     baseurl = 'https://crucial-woodcock-33.clerk.accounts.dev/v1/client/'
-    with httpx.Client() as c:
-        url = baseurl + 'sign_ins?_is_native=true'
-        print(url)
-        headers = {'Content-Type': 'application/x-www-form-urlencoded', }
-
-        data = {
-            "identifier": identifier,
-            "password": password,
-            "strategy": "password",
-        }
-        response = c.post(url, headers=headers, data=data)
-        if response.status_code == 200:
-            response = response.json()
-            return response['response']['created_session_id'], response['client']['sessions'][0]['last_active_token']['jwt']
-        else:
-            print("Login failed:", response)
-            return None
+    url = baseurl + 'sign_ins?_is_native=true'
+    print(url)
+    headers = {'Content-Type': 'application/x-www-form-urlencoded', }
+
+    data = {
+        "identifier": identifier,
+        "password": password,
+        "strategy": "password",
+    }
+    response = _SYNC.post(url, headers=headers, data=data)
+    if response.status_code == 200:
+        response = response.json()
+        return response['response']['created_session_id'], response['client']['sessions'][0]['last_active_token']['jwt']
+    else:
+        print("Login failed:", response)
+        return None
 
 
 class APIClient:
@@ -28,32 +30,35 @@ class APIClient:
         print("Token:", token)
         self.token = token
         self.base_url = "https://rest.focused.uno"
-        self.client = httpx.AsyncClient(base_url=self.base_url)
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+        )
         self.identifier = identifier
         self.password = password
 
+    async def _send(self, method: str, endpoint: str, headers: dict | None, query: dict | None) -> httpx.Response:
+        auth_header = {'Authorization': f"Bearer {self.token}"}
+        url = f"{self.base_url}{endpoint}"
+        return await self.client.request(method, url, headers={**auth_header, **(headers or {})}, params=query)
+
     async def request(self,  method: str = "GET", endpoint: str = "/", headers: dict | None = None, query: dict | None = None):
         if not self.token:
             print("Authentication failed. Cannot make request.")
             return None
 
-        auth_header = {'Authorization': f"Bearer {self.token}"}
-        headers = merge_dicts(auth_header, headers or {})
-
-        url = f"{self.base_url}{endpoint}"
+        response = await self._send(method, endpoint, headers, query)
+        # The token expired: sign in again and retry exactly once
+        if response.status_code == 401 and self.onUnautheticated():
+            response = await self._send(method, endpoint, headers, query)
 
         try:
-            response = await self.client.request(method, url, headers=headers, params=query)
             response.raise_for_status()
-            return response.json()
-
         except httpx.HTTPStatusError as e:
-            if e.response.status_code == 401:
-                self.onUnautheticated()
-                await self.request(method, url, headers=headers, query=query)
             print(
                 f"HTTP error occurred: {e.response.status_code} - {e.response.text}")
             return None
+        return response.json()
 
     async def get_users(self, query_params: dict | None = None) -> dict | None:
         endpoint = "/user"
@@ -71,7 +76,7 @@ class APIClient:
 
             queryParams = {"sessionId": session_id, "template": TEMPLATE_NAME}
 
-            response = httpx.get(url, params=queryParams, headers=headers)
+            response = _SYNC.get(url, params=queryParams, headers=headers)
             if response.status_code == 200:
                 jwt = response.json().get('jwt')
                 return jwt
@@ -90,17 +95,3 @@ class APIClient:
             return None
         return self.token
 
-
-def merge_dicts(dict1, dict2):
-    merged_dict = {}
-    for key in dict1:
-        if key in dict2:
-            merged_dict[key] = [dict1[key], dict2[key]]
-        else:
-            merged_dict[key] = dict1[key]
-
-    for key in dict2:
-        if key not in merged_dict:
-            merged_dict[key] = dict2[key]
-
-    return merged_dict
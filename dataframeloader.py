@@ -1,35 +1,194 @@
+import asyncio
+
 from apiClient import APIClient
 from db import get_database
+import numpy as np
 import pandas as pd
-from utils import parse_date, parse_body
+from utils import ADDED_NS, DATE_COLUMNS, USER_INDEX, _type_rows, parse_bodies
 
 lake = pd.DataFrame()
+# Bumped every time a new lake is published, so results cached against an old lake miss.
+lake_version = 0
+# Row positions of every event type in the current lake, see utils._type_rows.
+lake_type_rows = {}
+# Fingerprint of the sources the current lake was built from, see _source_fingerprint.
+_last_fingerprint = None
+# Newest report _id in the current lake, refreshes only fetch reports after it.
+_last_report_id = None
+# Number of reports the current lake was built from, duplicates included.
+_last_report_count = 0
+
+# Only these user/course fields are read from the lake downstream.
+USER_COLUMNS = ['user_id', 'name', 'lastname']
+COURSE_COLUMNS = ['course_id', 'title', 'teacher_id']
+# Report fields fetched from Mongo, everything else stays on the server.
+REPORT_FIELDS = ['userId', 'sessionId', 'courseId', 'type', 'device', 'addedAt', 'body']
+
+METRIC_COLUMNS = ['focus_gain.time', 'focus_lost.time', 'heartrate_change.count',
+                  'heartrate_change.mean', 'heartrate_change.value',
+                  'physical.detected_at', 'physical.speed', 'text_scroll.direction',
+                  'text_scroll.distance', 'text_scroll.position', 'text_scroll.time',
+                  'unpin_screen.at', 'video_jump.at', 'video_jump.direction',
+                  'video_jump.to', 'video_paused.at', 'video_paused.duration',
+                  'video_percentage.at', 'video_percentage.percentage',
+                  'video_speed_changed.at', 'video_speed_changed.speed',
+                  'weak_rssi.value', 'wearable_off.at']
+
+# Metrics rendered into user-facing text, kept as float64 so they print like the reported value.
+DISPLAY_METRIC_COLUMNS = {'video_speed_changed.speed'}
+# Low-cardinality string columns stored as categoricals.
+CATEGORY_COLUMNS = ['type', 'device', 'text_scroll.direction', 'video_jump.direction']
+# Id and name columns stored as Arrow strings: contiguous buffers instead of Python str objects,
+# compared and hashed by Arrow compute kernels.
+STRING_COLUMNS = ['user_id', 'name', 'lastname', 'userId', 'title', 'teacher_id']
+
+# Columns only used to build and refresh the lake, left out of its snapshot.
+BUILD_COLUMNS = ['_fp', ADDED_NS]
+
+# Fixed dtypes the metrics are hashed with, so a row hashes the same whether it was built
+# in a full load or in a small refresh batch where some columns are missing or all-NaN.
+FINGERPRINT_DTYPES = {
+    column: 'datetime64[ns, America/Bogota]' if column in DATE_COLUMNS
+    else object if column in CATEGORY_COLUMNS
+    else 'float64'
+    for column in METRIC_COLUMNS
+}
+
+
+def _factorize_keys(left: pd.Series, right: pd.Series) -> tuple[np.ndarray, np.ndarray]:
+    """Encodes both sides of a join with one shared set of integer codes, so the merge hashes ints."""
+    if left.empty or right.empty:
+        # Nothing to share, and pandas deprecates concatenating empty entries
+        return pd.factorize(left)[0], pd.factorize(right)[0]
+    codes, _ = pd.factorize(pd.concat([left, right], ignore_index=True))
+    return codes[:len(left)], codes[len(left):]
+
+
+def _downcast(df: pd.DataFrame) -> pd.DataFrame:
+    """Stores float metrics as float32, low-cardinality strings as categoricals and ids as Arrow strings."""
+    dtypes = {column: 'category' for column in CATEGORY_COLUMNS if column in df.columns}
+    dtypes.update({column: 'string[pyarrow]' for column in STRING_COLUMNS if column in df.columns})
+    dtypes.update({
+        column: 'float32' for column in METRIC_COLUMNS
+        if column in df.columns and column not in DISPLAY_METRIC_COLUMNS and df[column].dtype == 'float64'
+    })
+    return df.astype(dtypes)
+
+
+async def _source_fingerprint(reports_collection, userdf: pd.DataFrame, coursesdf: pd.DataFrame) -> tuple:
+    """
+    Cheap summary of everything the lake is built from: report count and newest report id
+    from Mongo, plus a hash of the users and courses.
+    """
+    newest = await reports_collection.find_one(sort=[('_id', -1)], projection={'_id': 1})
+    return (
+        await reports_collection.estimated_document_count(),
+        str(newest['_id']) if newest else None,
+        int(pd.util.hash_pandas_object(userdf, index=False).sum()),
+        int(pd.util.hash_pandas_object(coursesdf, index=False).sum()),
+    )
+
+
+def _build_rows(userdf: pd.DataFrame, coursesdf: pd.DataFrame, reports: pd.DataFrame) -> pd.DataFrame:
+    """
+    Joins reports with their user and course and flattens the bodies into metric columns.
+    Every row gets an `_fp` fingerprint of its metrics, used to deduplicate the lake.
+    """
+    userdf, coursesdf = userdf.copy(), coursesdf.copy()
+    userdf['_user_key'], reports['_user_key'] = _factorize_keys(userdf['user_id'], reports['userId'])
+    pre_lake = pd.merge(userdf, reports, on='_user_key', how='right',
+                        copy=False, validate='one_to_many')
+    coursesdf['_course_key'], pre_lake['_course_key'] = _factorize_keys(coursesdf['course_id'], pre_lake['courseId'])
+    pre_lake = (pre_lake.merge(coursesdf, on='_course_key', how='left',
+                               copy=False, validate='many_to_one')
+                .drop(columns=['_user_key', '_course_key']))
+    pre_lake['addedAt'] = (pd.to_datetime(pre_lake['addedAt'], unit='ms', utc=True, cache=True)
+                           .dt.tz_convert('America/Bogota'))
+    pre_lake[ADDED_NS] = pre_lake['addedAt'].to_numpy('datetime64[ns]').view('int64')
+    body_df = parse_bodies(pre_lake)
+    # Add the parsed columns in place rather than concatenating a body-less copy of pre_lake
+    del pre_lake['body']
+    for column in body_df.columns:
+        pre_lake[column] = body_df[column]
+    # One uint64 fingerprint of the metric columns instead of 23 mixed-dtype columns
+    metrics = pre_lake.reindex(columns=METRIC_COLUMNS).astype(FINGERPRINT_DTYPES)
+    pre_lake['_fp'] = pd.util.hash_pandas_object(metrics, index=False)
+    return pre_lake
+
+
+def _finalize(processed_lake: pd.DataFrame) -> pd.DataFrame:
+    """Deduplicates, sorts, indexes and downcasts built rows into the published lake."""
+    processed_lake = processed_lake.drop_duplicates(subset=['_fp'])
+    # Sort by user and time and index by user, so a user's rows are a contiguous slice
+    processed_lake = processed_lake.sort_values(['userId', 'addedAt'], kind='stable')
+    processed_lake = processed_lake.set_index(pd.Index(processed_lake['userId'], name=USER_INDEX))
+    return _downcast(processed_lake)
+
+
+def _write_snapshot(lake_df: pd.DataFrame, path: str = 'lake.parquet') -> None:
+    """Writes the lake as it is served, indexed by user and without its BUILD_COLUMNS, so it reads back as-is."""
+    lake_df.drop(columns=BUILD_COLUMNS).to_parquet(path, compression='zstd')
+
+
+def _build_lake(userdf: pd.DataFrame, coursesdf: pd.DataFrame, reports: pd.DataFrame,
+                base: pd.DataFrame | None = None) -> pd.DataFrame:
+    """
+    CPU-bound part of load_lake, run in a worker thread so the event loop keeps serving
+    requests meanwhile. The new rows are appended to `base` when one is given.
+    """
+    new_rows = _build_rows(userdf, coursesdf, reports)
+    if base is not None:
+        if new_rows.empty:
+            return base
+        print('Appending', len(new_rows), 'new reports to the lake.')
+        new_rows = pd.concat([base, new_rows])
+    return _finalize(new_rows)
+
 
 async def load_lake(api: APIClient = None,db =None):
     print('Loading lake...')
-    global lake
+    global lake, lake_version, lake_type_rows, _last_fingerprint, _last_report_id, _last_report_count
     users = await api.get_users()
-    userdf = pd.DataFrame(users)
     courses = await api.request(endpoint="/course")
-    coursesdf = pd.DataFrame(courses)
+    if users is None or courses is None:
+        # The API client returns None on failure, keep serving the last good lake instead of one without users.
+        print('Could not fetch users or courses, keeping the current lake.')
+        return
+    userdf = (pd.DataFrame(users).reindex(columns=USER_COLUMNS)
+              .drop_duplicates(subset=['user_id']))
+    coursesdf = (pd.DataFrame(courses).reindex(columns=COURSE_COLUMNS)
+                 .drop_duplicates(subset=['course_id']))
     reports_collection = db['test']['reports']
-    reports = pd.DataFrame(list(reports_collection.find({})))
-    pre_lake = (pd.merge(userdf, reports, left_on='user_id', right_on='userId', how='right')
-                .merge(coursesdf, left_on='courseId', right_on='course_id', how='left')
-                )
-    metric_columns = ['focus_gain.time', 'focus_lost.time', 'heartrate_change.count',
-                      'heartrate_change.mean', 'heartrate_change.value',
-                      'physical.detected_at', 'physical.speed', 'text_scroll.direction',
-                      'text_scroll.distance', 'text_scroll.position', 'text_scroll.time',
-                      'unpin_screen.at', 'video_jump.at', 'video_jump.direction',
-                      'video_jump.to', 'video_paused.at', 'video_paused.duration',
-                      'video_percentage.at', 'video_percentage.percentage',
-                      'video_speed_changed.at', 'video_speed_changed.speed',
-                      'weak_rssi.value', 'wearable_off.at']
-    pre_lake['addedAt'] = pre_lake['addedAt'].apply(parse_date)
-    body_df = pre_lake.apply(lambda row: parse_body(row['body'], row['type']), axis=1)
-    processed_lake = pd.concat([pre_lake.drop(columns=['body']), body_df], axis=1)
-    processed_lake = processed_lake.drop_duplicates(subset=metric_columns)
-    lake = processed_lake.reset_index(drop=True)
-    lake.to_csv('lake.csv')
-    print('🖕🏼Lake loaded successfully with shape:', lake.shape, 'and columns:', lake.columns.tolist())
+    fingerprint = await _source_fingerprint(reports_collection, userdf, coursesdf)
+    if fingerprint == _last_fingerprint:
+        print('Lake sources unchanged, skipping refresh.')
+        return
+
+    # Users and courses are joined into every row, so while they are unchanged and every report
+    # the lake was built from is still there, the reports added since the last build are all that
+    # needs processing. The exact count up to the newest built report drops on any deletion,
+    # even when as many reports were inserted meanwhile.
+    incremental = (
+            _last_report_id is not None
+            and fingerprint[2:] == _last_fingerprint[2:]
+            and await reports_collection.count_documents({'_id': {'$lte': _last_report_id}}) == _last_report_count
+    )
+    query = {'_id': {'$gt': _last_report_id}} if incremental else {}
+    cursor = reports_collection.find(
+        query, projection={field: 1 for field in REPORT_FIELDS}
+    ).batch_size(5000)
+    reports = pd.DataFrame.from_records(await cursor.to_list(), columns=['_id', *REPORT_FIELDS])
+    newest_report_id = reports['_id'].max() if not reports.empty else _last_report_id
+    new_lake = await asyncio.to_thread(
+        _build_lake, userdf, coursesdf, reports.drop(columns=['_id']), lake if incremental else None
+    )
+    new_type_rows = await asyncio.to_thread(_type_rows, new_lake)
+    # Publish the finished frame and its type index together, readers see either the old or the new lake.
+    # The version is bumped after it, so a reader that read the new version also sees the new lake.
+    lake, lake_type_rows = new_lake, new_type_rows
+    lake_version += 1
+    _last_fingerprint = fingerprint
+    _last_report_id = newest_report_id
+    _last_report_count = (_last_report_count if incremental else 0) + len(reports)
+    await asyncio.to_thread(_write_snapshot, new_lake)
+    print('🖕🏼Lake loaded successfully with shape:', new_lake.shape, 'and columns:', new_lake.columns.tolist())
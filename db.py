@@ -1,14 +1,14 @@
 import os
-from pymongo import MongoClient
+from pymongo import AsyncMongoClient
 import dotenv
 
 dotenv.load_dotenv()
 connection_string = os.environ.get("CONNECTION_STRING")
 
-def get_database()-> MongoClient | None:
+def get_database()-> AsyncMongoClient | None:
     try:
         print("Connecting to MongoDB...")
-        db = MongoClient(connection_string)
+        db = AsyncMongoClient(connection_string)
     except Exception as e:
         print(e)
         return None
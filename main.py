@@ -1,13 +1,16 @@
-from fastapi import FastAPI, HTTPException, Depends, Request
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, Response
 from db import get_database
 from typing import Any, Dict, List, Union, Annotated
-from pydantic import BaseModel, Field
+from datetime import datetime
+from pydantic import BaseModel, Field, field_validator
 import uvicorn
 from fastapi_clerk_auth import ClerkConfig, ClerkHTTPBearer, HTTPAuthorizationCredentials
 import os
 from dotenv import load_dotenv
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 import dataframeloader as df_loader
+from utils import parse_date
 from apiClient import APIClient
 import asyncio
 from contextlib import asynccontextmanager
@@ -53,6 +56,7 @@ async def lifespan(app: FastAPI):
     print("Application starting up...")
     # Initialize API and DB clients
     api_client = APIClient(identifier=API_IDENTIFIER, password=API_PASSWORD)
+    app.state.api_client = api_client
     db_client = get_database()
 
     # Perform initial data load
@@ -77,7 +81,8 @@ async def lifespan(app: FastAPI):
 # --------------------------------------------------------------------------
 # FastAPI Application Initialization
 # --------------------------------------------------------------------------
-app = FastAPI(lifespan=lifespan)
+# Responses are encoded with orjson rather than the stdlib json module
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 mongo_client = get_database()
 
 app.add_middleware(
@@ -105,33 +110,45 @@ class Report(BaseModel):
     )
 
 
+class ReportQuery(BaseModel):
+    user_id: str
+    start_date: datetime = Field(..., description="Start of the report period, in America/Bogota")
+    end_date: datetime = Field(..., description="End of the report period (inclusive), in America/Bogota")
+
+    @field_validator("start_date", "end_date", mode="before")
+    @classmethod
+    def _parse_date(cls, value: Any) -> Any:
+        # Dates are parsed once here and reach the report as pd.Timestamp
+        return parse_date(value) if isinstance(value, (str, int)) else value
+
+
 # --------------------------------------------------------------------------
 # API Endpoints
 # --------------------------------------------------------------------------
 @app.get("/student/report/")
-async def student_report(user_id: str, start_date: str, end_date: str,
+async def student_report(query: Annotated[ReportQuery, Query()],
      # request: Request,
      # credentials: HTTPAuthorizationCredentials | None = Depends(clerk_auth_guard)
  ):
     """
     Generates a student report from the in-memory data lake.
     """
-    print("DATALAKE 🍎", df_loader.lake)
     if df_loader.lake.empty:
         raise HTTPException(
             status_code=503,
             detail="Data lake is not yet available. Please try again in a few moments."
         )
-    # Assuming get_user_report is imported or defined elsewhere
-    from service import get_user_report
+    # Assuming get_user_report_json_cached is imported or defined elsewhere
+    from service import get_user_report_json_cached
     try:
-        report = get_user_report(df_loader.lake, user_id, start_date, end_date)
+        report_json = get_user_report_json_cached(query.user_id, query.start_date, query.end_date)
     except ValueError as e:
         raise HTTPException(
             status_code=404,
             detail=str(e)
         )
-    return report
+    # The report comes already encoded by pydantic, cached along with the report itself
+    return Response(content=report_json, media_type="application/json")
 
 @app.get("/teacher/report/")
 async def teacher_report(
@@ -144,7 +161,9 @@ async def teacher_report(
     """
     Generates a teacher report from the in-memory data lake.
     """
-    if df_loader.lake.empty:
+    # Read the published lake once, a refresh may swap it while the report is awaited
+    lake = df_loader.lake
+    if lake.empty:
         raise HTTPException(
             status_code=503,
             detail="Data lake is not yet available. Please try again in a few moments."
@@ -153,8 +172,8 @@ async def teacher_report(
     from metriccalc.teacherreport import get_teacher_report
     try:
         report = await get_teacher_report(
-            api=APIClient(identifier=API_IDENTIFIER, password=API_PASSWORD),
-            df=df_loader.lake,
+            api=request.app.state.api_client,
+            df=lake,
             teacher_id=teacher_id,
             start_date=start_date,
             end_date=end_date
@@ -192,23 +211,23 @@ async def add_report(
         raise HTTPException(status_code=503, detail="MongoDB connection failed")
 
     collection = mongo_client["test"]["reports"]
-    report_dict = report.model_dump()
-    meta: Dict[str, Any] = {k: v for k, v in report_dict.items() if k != "body"}
-    body_payload = report_dict["body"]
+    # Dump only the metadata, the validated body is stored as is
+    meta: Dict[str, Any] = report.model_dump(exclude={"body"})
+    body_payload = report.body
 
     if isinstance(body_payload, list):
         docs: List[Dict[str, Any]] = [
-            {**meta, "body": single_body} for single_body in body_payload
+            dict(meta, body=single_body) for single_body in body_payload
         ]
         try:
-            result = collection.insert_many(docs)
+            result = await collection.insert_many(docs, ordered=False)
             inserted_ids = [str(_id) for _id in result.inserted_ids]
             return {"status": "success", "insertedIds": inserted_ids}
         except Exception as exc:
             raise HTTPException(status_code=500, detail=f"Failed to insert reports: {exc}")
     else:
         try:
-            result = collection.insert_one({**meta, "body": body_payload})
+            result = await collection.insert_one(dict(meta, body=body_payload))
             return {"status": "success", "insertedId": str(result.inserted_id)}
         except Exception as exc:
             raise HTTPException(status_code=500, detail=f"Failed to insert report: {exc}")
@@ -1,6 +1,7 @@
 import pandas as pd
 import numpy as np
 from typing import Optional, Dict, Any
+from utils import USER_INDEX, _added_ns, _session_codes, _type_codes, _user_rows, _user_type_rows
 
 # --- 1. Constants and Configuration --
 # Master weights for each component of the concentration score
@@ -14,6 +15,8 @@ METRIC_WEIGHTS = {
     "WEAK_SIGNAL": 0.15,
     "WATCH_OFF": 0.1,
 }
+# The same weights as a vector, in METRIC_WEIGHTS order
+METRIC_WEIGHT_VECTOR = np.fromiter(METRIC_WEIGHTS.values(), dtype=np.float64)
 
 # Configuration for calculations
 HRTC_DOWN_PX = 500
@@ -24,177 +27,175 @@ PHYSICAL_ACTIVITY_THRESHOLD_MS = 1.0
 
 
 # --- 2. Helper Functions for Each Metric ---
+# Each helper scores every session at once. `session_of_row` holds the session number
+# (0..n_sessions-1) of every row and the `is_*` masks select the rows of one event type.
 
 
-def _calculate_text_scroll_score(session_df: pd.DataFrame) -> float:
+def _per_session(
+        session_of_row: np.ndarray, n_sessions: int, mask: np.ndarray, values: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """Per session sum of `values` over the rows in `mask`, or number of such rows without values."""
+    weights = None if values is None else values[mask]
+    return np.bincount(session_of_row[mask], weights=weights, minlength=n_sessions)
+
+
+def _calculate_text_scroll_score(
+        session_of_row: np.ndarray, n_sessions: int, is_scroll: np.ndarray,
+        distances: np.ndarray, is_up: np.ndarray,
+) -> np.ndarray:
     """Calculates the concentration score based on text scrolling behavior."""
-    scroll_events = session_df[session_df["type"] == "TEXT_SCROLL"].dropna(
-        subset=["text_scroll.distance"]
-    )
-    if scroll_events.empty:
-        return 1.0  # Perfect score if no scrolling occurred
+    is_scroll = is_scroll & ~np.isnan(distances)
+    n_scrolls = _per_session(session_of_row, n_sessions, is_scroll)
 
     # 2a. Consistency Score (based =on Coefficient of Variation)
-    distances = scroll_events["text_scroll.distance"]
-    if len(distances) < 2:
-        consistency_score = 1.0  # Cannot calculate CV for < 2 events
-    else:
-        mean_dist = distances.mean()
-        std_dist = distances.std()
-        if mean_dist == 0:
-            cv = 1.0  # Avoid division by zero; high CV if mean is 0
-        else:
-            cv = std_dist / mean_dist
-        consistency_score = np.exp(-cv)  # Exponential decay for good 0-1 score
+    mean_dist = _per_session(session_of_row, n_sessions, is_scroll, distances) / n_scrolls
+    squared_deviation = (distances - mean_dist[session_of_row]) ** 2
+    std_dist = np.sqrt(_per_session(session_of_row, n_sessions, is_scroll, squared_deviation) / (n_scrolls - 1))
+    # Avoid division by zero; high CV if mean is 0
+    cv = np.where(mean_dist == 0, 1.0, std_dist / mean_dist)
+    # Exponential decay for good 0-1 score. Cannot calculate CV for < 2 events
+    consistency_score = np.where(n_scrolls < 2, 1.0, np.exp(-cv))
 
     # 2b. Scroll Quality Score
-    def get_quality(row):
-        direction_factor = 0.8 if row["text_scroll.direction"] == "up" else 1.0
-        hrtc = HRTC_UP_PX if row["text_scroll.direction"] == "up" else HRTC_DOWN_PX
-        # Cap score at 1 to prevent huge scrolls from giving extra credit
-        return direction_factor * min(1, row["text_scroll.distance"] / hrtc)
-
-    scroll_quality_score = scroll_events.apply(get_quality, axis=1).mean()
+    direction_factor = np.where(is_up, 0.8, 1.0)
+    hrtc = np.where(is_up, HRTC_UP_PX, HRTC_DOWN_PX)
+    # Cap score at 1 to prevent huge scrolls from giving extra credit
+    quality = direction_factor * np.minimum(1.0, distances / hrtc)
+    scroll_quality_score = _per_session(session_of_row, n_sessions, is_scroll, quality) / n_scrolls
 
-    # 2c. Final Combined Score
-    return (0.15 * consistency_score) + (0.85 * scroll_quality_score)
+    # 2c. Final Combined Score, perfect score if no scrolling occurred
+    return np.where(n_scrolls == 0, 1.0, (0.15 * consistency_score) + (0.85 * scroll_quality_score))
 
 
-def _calculate_video_jump_score(
-        session_df: pd.DataFrame, user_history_df: pd.DataFrame
-) -> float:
-    """Calculates score based on deviation from user's avg jump frequency."""
-    # Calculate historical average jumps per session for this user
-    user_jumps_per_session = (
-        user_history_df[user_history_df["type"] == "VIDEO_JUMP"]
-        .groupby("sessionId")
-        .size()
-    )
+def _average_jumps_per_session(user_history_df: pd.DataFrame, jump_rows: np.ndarray = None) -> float:
+    """
+    Historical average of VIDEO_JUMP events per session for this user.
+    `jump_rows` are the positions of the jumps in the history when already known.
+    """
+    if jump_rows is None:
+        type_codes, type_code = _type_codes(user_history_df)
+        jump_rows = np.flatnonzero(type_codes == type_code.get("VIDEO_JUMP", -2))
+    user_jumps_per_session = user_history_df["sessionId"].iloc[jump_rows].value_counts(sort=False)
     # Use a default of 5 if no history, to avoid penalizing new users
-    ajs = user_jumps_per_session.mean() if not user_jumps_per_session.empty else 5.0
+    return user_jumps_per_session.mean() if not user_jumps_per_session.empty else 5.0
+
 
-    # Jumps in the current session
-    sjs = len(session_df[session_df["type"] == "VIDEO_JUMP"])
+def _calculate_video_jump_score(
+        session_of_row: np.ndarray, n_sessions: int, is_jump: np.ndarray, ajs: float
+) -> np.ndarray:
+    """Calculates score based on deviation of each session's jumps (sjs) from user's avg jump frequency."""
+    sjs = _per_session(session_of_row, n_sessions, is_jump)
 
     if ajs == 0:
-        return 0.0 if sjs > 0 else 1.0  # If avg is 0, any jump is bad
+        return np.where(sjs > 0, 0.0, 1.0)  # If avg is 0, any jump is bad
 
-    score = max(0, 1 - (abs(sjs - ajs) / ajs))
-    return score
+    return np.maximum(0, 1 - (np.abs(sjs - ajs) / ajs))
 
 
-def _calculate_video_pause_score(session_df: pd.DataFrame) -> float:
+def _calculate_video_pause_score(
+        session_of_row: np.ndarray, n_sessions: int, is_pause: np.ndarray, durations: np.ndarray
+) -> np.ndarray:
     """Calculates score based on long video pauses."""
-    long_pauses = session_df[
-        (session_df["type"] == "VIDEO_PAUSED")
-        & (session_df["video_paused.duration"] > VIDEO_PAUSE_THRESHOLD_S)
-        ]
-    if long_pauses.empty:
-        return 1.0
+    long_pauses = is_pause & (durations > VIDEO_PAUSE_THRESHOLD_S)
 
-    # For each long pause, calculate a penalty. Then multiply all factors.
-    penalties = long_pauses["video_paused.duration"].apply(
-        lambda d: 1 - (min(d, VIDEO_PAUSE_MAX_S) / VIDEO_PAUSE_MAX_S)
-    )
-    return np.prod(penalties)
+    # For each long pause, calculate a penalty. Then multiply all factors of a session.
+    penalties = 1 - np.minimum(durations, VIDEO_PAUSE_MAX_S) / VIDEO_PAUSE_MAX_S
+    scores = np.ones(n_sessions)
+    np.multiply.at(scores, session_of_row[long_pauses], penalties[long_pauses])
+    return scores
 
 
-def _calculate_video_speed_score(session_df: pd.DataFrame) -> float:
+def _calculate_video_speed_score(
+        session_of_row: np.ndarray, n_sessions: int, is_speed: np.ndarray, speeds: np.ndarray
+) -> np.ndarray:
     """Calculates score based on video playback speed."""
-    speed_events = session_df[
-        session_df["type"] == "VIDEO_SPEED_CHANGED"
-        ].dropna(subset=["video_speed_changed.speed"])
-    if speed_events.empty:
-        return 1.0
-
-    def score_speed(s):
-        if s <= 1.25:
-            return 1.0
-        elif 1.25 < s <= 2.0:
-            return 1 - 0.5 * (s - 1.25)
-        else:
-            return 0.0
+    is_speed = is_speed & ~np.isnan(speeds)
+    n_speeds = _per_session(session_of_row, n_sessions, is_speed)
 
-    return speed_events["video_speed_changed.speed"].apply(score_speed).mean()
+    # Full score up to 1.25x, linear decay up to 2x, nothing above
+    scores = np.where(
+        speeds <= 1.25, 1.0, np.where(speeds <= 2.0, 1 - 0.5 * (speeds - 1.25), 0.0)
+    )
+    return np.where(n_speeds == 0, 1.0, _per_session(session_of_row, n_sessions, is_speed, scores) / n_speeds)
 
 
-def _calculate_tab_focus_score(session_df: pd.DataFrame) -> float:
+def _calculate_tab_focus_score(
+        session_of_row: np.ndarray, n_sessions: int, added_ns: np.ndarray,
+        is_lost: np.ndarray, lost_times: np.ndarray, is_gain: np.ndarray, gain_times: np.ndarray,
+) -> np.ndarray:
     """Calculates score based on time the tab was in focus."""
-    session_start = session_df["addedAt"].min()
-    session_end = session_df["addedAt"].max()
-    total_duration = (session_end - session_start).total_seconds()
-
-    if total_duration == 0:
-        return 1.0
-
-    focus_lost_events = session_df[session_df["type"] == "TAB_FOCUS_LOST"].sort_values(
-        by="focus_lost.time"
-    )
-    focus_gain_events = session_df[session_df["type"] == "TAB_FOCUS_GAIN"].sort_values(
-        by="focus_gain.time"
-    )
-
-    total_distraction_seconds = 0
-    for _, lost_event in focus_lost_events.iterrows():
-        # Find the first gain event that happened after this lost event
-        gain_after = focus_gain_events[
-            focus_gain_events["focus_gain.time"] > lost_event["focus_lost.time"]
-            ]
-        if not gain_after.empty:
-            gain_time = gain_after.iloc[0]["focus_gain.time"]
-            total_distraction_seconds += (
-                    gain_time - lost_event["focus_lost.time"]
-            ).total_seconds()
-        else:
-            # If no gain found, user was distracted until session end
-            total_distraction_seconds += (
-                    session_end - lost_event["focus_lost.time"]
-            ).total_seconds()
-
-    focused_duration = max(0, total_duration - total_distraction_seconds)
-    return focused_duration / total_duration
-
-
-def _calculate_physical_activity_score(session_df: pd.DataFrame) -> float:
+    session_start = np.full(n_sessions, np.iinfo(np.int64).max)
+    session_end = np.full(n_sessions, np.iinfo(np.int64).min)
+    np.minimum.at(session_start, session_of_row, added_ns)
+    np.maximum.at(session_end, session_of_row, added_ns)
+    total_duration = (session_end - session_start) / 1_000_000_000
+
+    is_gain = is_gain & ~np.isnat(gain_times)
+    lost_ns = lost_times[is_lost].view("int64")
+
+    # Pair each lost event with the first gain event of its session strictly after it:
+    # sort lost and gain events by (session, time), gains first on equal times, and take the next gain.
+    event_session = np.concatenate([session_of_row[is_lost], session_of_row[is_gain]])
+    event_ns = np.concatenate([lost_ns, gain_times[is_gain].view("int64")])
+    event_is_lost = np.concatenate([np.ones(len(lost_ns), dtype=bool), np.zeros(is_gain.sum(), dtype=bool)])
+    order = np.lexsort((event_is_lost, event_ns, event_session))
+    event_session, event_ns, event_is_lost = event_session[order], event_ns[order], event_is_lost[order]
+
+    no_gain = len(order)
+    next_gain = np.minimum.accumulate(np.where(event_is_lost, no_gain, np.arange(len(order)))[::-1])[::-1]
+    next_gain = np.append(next_gain, no_gain)[np.flatnonzero(event_is_lost)]
+    lost_session = event_session[event_is_lost]
+    found = next_gain < no_gain
+    found[found] = event_session[next_gain[found]] == lost_session[found]
+    # If no gain found, user was distracted until session end
+    paired_ns = np.where(found, event_ns[np.minimum(next_gain, no_gain - 1)], session_end[lost_session])
+    distraction_ns = (paired_ns - event_ns[event_is_lost]).astype(np.float64)
+    total_distraction_seconds = np.bincount(lost_session, weights=distraction_ns, minlength=n_sessions) / 1_000_000_000
+    # A lost event without a time leaves the distraction unknown, and the session unfocused
+    unknown = _per_session(session_of_row, n_sessions, is_lost & np.isnat(lost_times)) > 0
+
+    focused_duration = np.where(unknown, 0.0, np.maximum(0, total_duration - total_distraction_seconds))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(total_duration == 0, 1.0, focused_duration / total_duration)
+
+
+def _calculate_physical_activity_score(
+        session_of_row: np.ndarray, n_sessions: int, is_activity: np.ndarray, speeds: np.ndarray
+) -> np.ndarray:
     """Calculates score based on the user's physical movement."""
-    activity_events = session_df[
-        session_df["type"] == "USER_PHYSICAL_ACTIVITY"
-        ].dropna(subset=["physical.speed"])
-    if activity_events.empty:
-        return 1.0
+    is_activity = is_activity & ~np.isnan(speeds)
+    n_activity = _per_session(session_of_row, n_sessions, is_activity)
 
-    sedentary_events = (
-            activity_events["physical.speed"] <= PHYSICAL_ACTIVITY_THRESHOLD_MS
-    ).sum()
-    return sedentary_events / len(activity_events)
+    # Share of sedentary events among the ones with a speed
+    sedentary_events = _per_session(
+        session_of_row, n_sessions, is_activity & (speeds <= PHYSICAL_ACTIVITY_THRESHOLD_MS)
+    )
+    return np.where(n_activity == 0, 1.0, sedentary_events / n_activity)
 
 
-def _calculate_weak_signal_score(session_df: pd.DataFrame) -> float:
+def _calculate_weak_signal_score(
+        session_of_row: np.ndarray, n_sessions: int, is_signal: np.ndarray, rssi: np.ndarray
+) -> np.ndarray:
     """Calculates score based on network signal strength (RSSI)."""
-    signal_events = session_df[session_df["type"] == "WEAK_RSSI"].dropna(
-        subset=["weak_rssi.value"]
-    )
-    if signal_events.empty:
-        return 1.0
+    is_signal = is_signal & ~np.isnan(rssi)
+    n_signal = _per_session(session_of_row, n_sessions, is_signal)
 
-    # Map RSSI from [-90 (bad), -70 (good)] to [0, 1]
-    def score_rssi(rssi):
-        score = (rssi + 90) / 20  # (-90 -> 0, -70 -> 1)
-        return np.clip(score, 0, 1)  # Clamp result between 0 and 1
+    # Map RSSI from [-90 (bad), -70 (good)] to [0, 1], clamped
+    scores = np.clip((rssi + 90.0) / 20.0, 0.0, 1.0)
+    return np.where(n_signal == 0, 1.0, _per_session(session_of_row, n_sessions, is_signal, scores) / n_signal)
 
-    return signal_events["weak_rssi.value"].apply(score_rssi).mean()
 
-
-def _calculate_watch_off_score(session_df: pd.DataFrame) -> float:
+def _calculate_watch_off_score(session_of_row: np.ndarray, n_sessions: int, is_off: np.ndarray) -> np.ndarray:
     """Calculates score based on the number of times the watch was removed."""
-    n_off = len(session_df[session_df["type"] == "WEARABLE_OFF"])
-    return max(0, 1 - 0.5 * n_off)
+    n_off = _per_session(session_of_row, n_sessions, is_off)
+    return np.maximum(0, 1 - 0.5 * n_off)
 
 
 # --- 3. Main Orchestration Function ---
 
 
-def get_concentration_score( full_df: pd.DataFrame, user_id: str, start_date: str, end_date: str, ) -> Optional[Dict[str, Any]]:
+def get_concentration_score( full_df: pd.DataFrame, user_id: str, start_date: str, end_date: str,
+                             type_rows: Optional[Dict[str, np.ndarray]] = None, ) -> Optional[Dict[str, Any]]:
     """
     Calculates the average concentration score for a given user over a date range.
 
@@ -203,6 +204,8 @@ def get_concentration_score( full_df: pd.DataFrame, user_id: str, start_date: st
         user_id: The ID of the user to generate the report for.
         start_date: The start of the report period (e.g., '2025-06-01').
         end_date: The end of the report period (e.g., '2025-06-30').
+        type_rows: Optional `utils._type_rows` index of `full_df`, used to find the
+                   user's historical jumps without scanning their event types.
 
     Returns:
         The average concentration score (0-1) or None if no data is found.
@@ -212,24 +215,37 @@ def get_concentration_score( full_df: pd.DataFrame, user_id: str, start_date: st
         "America/Bogota"
     ) + pd.Timedelta(days=1)
 
-    # Filter data for the specific user and date range
-    user_period_df = full_df[
-        (full_df["userId"] == user_id)
-        & (full_df["addedAt"] >= start_ts)
-        & (full_df["addedAt"] < end_ts)
-        ].copy()
+    # Filter the user's rows down to the date range
+    user_history_df = _user_rows(full_df, user_id)
+    user_period_df = user_history_df[
+        (user_history_df["addedAt"] >= start_ts)
+        & (user_history_df["addedAt"] < end_ts)
+        ]
+    return get_concentration_score_for_period(full_df, user_id, user_period_df, type_rows)
+
 
+def get_concentration_score_for_period(
+        full_df: pd.DataFrame, user_id: str, user_period_df: pd.DataFrame,
+        type_rows: Optional[Dict[str, np.ndarray]] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    get_concentration_score on the user's rows in the period, already selected by the caller.
+    `full_df` is still needed for the user's whole history.
+    """
     if user_period_df.empty or "sessionId" not in user_period_df.columns:
         print("No data found for this user in the specified period.")
         return None
 
-    # Get all historical data for this user for the video jump calculation
-    user_history_df = full_df[full_df["userId"] == user_id].copy()
-    return get_concentration_score_no_filter(user_period_df, user_history_df)
+    user_history_df = _user_rows(full_df, user_id)
+    jump_rows = None
+    if type_rows is not None and full_df.index.name == USER_INDEX:
+        jump_rows = _user_type_rows(full_df, type_rows, user_id, "VIDEO_JUMP")
+    ajs = _average_jumps_per_session(user_history_df, jump_rows)
+    return get_concentration_score_no_filter(user_period_df, user_history_df, ajs)
 
 
 def get_concentration_score_no_filter(
-        user_period_df: pd.DataFrame, user_history_df: pd.DataFrame
+        user_period_df: pd.DataFrame, user_history_df: pd.DataFrame, ajs: Optional[float] = None
 ) -> Optional[Dict[str, Any]]:
     """
     Calculates the average concentration score for a given user's sessions
@@ -242,50 +258,84 @@ def get_concentration_score_no_filter(
         user_history_df: A DataFrame containing all historical events for
                          the specific user. This is used for metrics like
                          VIDEO_JUMP to compare against historical averages.
+        ajs: The user's historical average of jumps per session, computed
+             from `user_history_df` when not given.
 
     Returns:
-        A dictionary containing the average concentration score (0-1) and
-        individual sub-scores for each session, or None if no valid data
-        or sessions are found.
+        A dictionary containing the average concentration score (0-1),
+        individual sub-scores for each session and each session's weighted
+        score by session id, or None if no valid data or sessions are found.
     """
 
     if user_period_df.empty or "sessionId" not in user_period_df.columns:
         print("No data found for this user in the specified period.")
         return None
 
-    session_scores = []
-    sub_scores_list = []
-    for session_id, session_df in user_period_df.groupby("sessionId"):
-        if session_df.empty:
-            continue
-
-        # Calculate sub-score for each metric
-        # If a metric type is absent, it gets a perfect score of 1.0
-        sub_scores = {
-            "SESSION_ID": session_id,
-            "TEXT_SCROLL": _calculate_text_scroll_score(session_df),
-            "VIDEO_JUMP": _calculate_video_jump_score(session_df, user_history_df),
-            "VIDEO_PAUSE": _calculate_video_pause_score(session_df),
-            "VIDEO_SPEED": _calculate_video_speed_score(session_df),
-            "TAB_FOCUS": _calculate_tab_focus_score(session_df),
-            "PHYSICAL_ACTIVITY": _calculate_physical_activity_score(session_df),
-            "WEAK_SIGNAL": _calculate_weak_signal_score(session_df),
-            "WATCH_OFF": _calculate_watch_off_score(session_df),
+    # The history is the same for every session, so its jump average is computed once
+    if ajs is None:
+        ajs = _average_jumps_per_session(user_history_df)
+
+    # Every metric is scored for all sessions at once, on the period's column arrays
+    has_session = user_period_df["sessionId"].notna()
+    if not has_session.all():
+        user_period_df = user_period_df[has_session]
+    session_ids, session_of_row = _session_codes(user_period_df)
+    n_sessions = len(session_ids)
+    type_codes, type_code = _type_codes(user_period_df)
+
+    def is_type(event_type: str) -> np.ndarray:
+        return type_codes == type_code.get(event_type, -2)
+
+    def column(name: str, dtype=np.float64) -> np.ndarray:
+        return user_period_df[name].to_numpy(dtype)
+
+    # If a metric type is absent, it gets a perfect score of 1.0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        metric_scores = {
+            "TEXT_SCROLL": _calculate_text_scroll_score(
+                session_of_row, n_sessions, is_type("TEXT_SCROLL"),
+                column("text_scroll.distance"), user_period_df["text_scroll.direction"].to_numpy() == "up",
+            ),
+            "VIDEO_JUMP": _calculate_video_jump_score(session_of_row, n_sessions, is_type("VIDEO_JUMP"), ajs),
+            "VIDEO_PAUSE": _calculate_video_pause_score(
+                session_of_row, n_sessions, is_type("VIDEO_PAUSED"), column("video_paused.duration")
+            ),
+            "VIDEO_SPEED": _calculate_video_speed_score(
+                session_of_row, n_sessions, is_type("VIDEO_SPEED_CHANGED"), column("video_speed_changed.speed")
+            ),
+            "TAB_FOCUS": _calculate_tab_focus_score(
+                session_of_row, n_sessions, _added_ns(user_period_df),
+                is_type("TAB_FOCUS_LOST"), column("focus_lost.time", "datetime64[ns]"),
+                is_type("TAB_FOCUS_GAIN"), column("focus_gain.time", "datetime64[ns]"),
+            ),
+            "PHYSICAL_ACTIVITY": _calculate_physical_activity_score(
+                session_of_row, n_sessions, is_type("USER_PHYSICAL_ACTIVITY"), column("physical.speed")
+            ),
+            "WEAK_SIGNAL": _calculate_weak_signal_score(
+                session_of_row, n_sessions, is_type("WEAK_RSSI"), column("weak_rssi.value")
+            ),
+            "WATCH_OFF": _calculate_watch_off_score(session_of_row, n_sessions, is_type("WEARABLE_OFF")),
         }
-        sub_scores_list += [sub_scores]
 
-        # Calculate the final weighted score for the session
-        final_session_score = sum(
-            sub_scores[metric] * weight for metric, weight in METRIC_WEIGHTS.items()
-        )
-        session_scores.append(final_session_score)
+    # (sessions x metrics), one row of sub-scores per session
+    sub_score_matrix = np.column_stack([metric_scores[metric] for metric in METRIC_WEIGHTS])
+    sub_scores_list = [
+        {"SESSION_ID": session_id, **dict(zip(METRIC_WEIGHTS, sub_scores))}
+        for session_id, sub_scores in zip(session_ids.tolist(), sub_score_matrix.tolist())
+    ]
 
-    if not session_scores:
+    if not sub_scores_list:
         print("No valid sessions found to calculate a score.")
         return None
 
+    # Final weighted score of every session at once: (sessions x metrics) @ weights
+    session_scores = sub_score_matrix @ METRIC_WEIGHT_VECTOR
+
     # Return the average score across all sessions in the period
     return {
         "concentration_score": np.mean(session_scores),
         "sub_scores": sub_scores_list,
+        "session_scores": dict(
+            zip((sub_scores["SESSION_ID"] for sub_scores in sub_scores_list), session_scores.tolist())
+        ),
     }
\ No newline at end of file
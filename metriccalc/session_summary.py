@@ -1,11 +1,16 @@
-from utils import _filter_data
+from utils import _added_ns, _filter_data, _session_codes, parse_date
+import numpy as np
 import pandas as pd
 
 def get_number_of_sessions(
         df: pd.DataFrame, user_id: str, start_date: str, end_date: str
 ) -> int:
     """Calculates the total number of unique study sessions for a user."""
-    user_df = _filter_data(df, user_id, start_date, end_date)
+    return get_number_of_sessions_no_filter(_filter_data(df, user_id, parse_date(start_date), parse_date(end_date)))
+
+
+def get_number_of_sessions_no_filter(user_df: pd.DataFrame) -> int:
+    """get_number_of_sessions on the user's rows in the period, already selected by the caller."""
     return user_df["sessionId"].nunique()
 
 
@@ -13,12 +18,26 @@ def get_average_session_time(
         df: pd.DataFrame, user_id: str, start_date: str, end_date: str
 ) -> float:
     """Calculates the average session time in seconds."""
-    user_df = _filter_data(df, user_id, start_date, end_date)
+    return get_average_session_time_no_filter(_filter_data(df, user_id, parse_date(start_date), parse_date(end_date)))
+
+
+def get_average_session_time_no_filter(user_df: pd.DataFrame) -> float:
+    """get_average_session_time on the user's rows in the period, already selected by the caller."""
     if user_df.empty:
         return 0.0
 
-    session_times = user_df.groupby("sessionId")["addedAt"].agg(["min", "max"])
-    session_durations = session_times["max"] - session_times["min"]
-    avg_duration_seconds = session_durations.mean().total_seconds()
+    # Every session's first and last time, accumulated per session number in one pass each
+    session_ids, session_of_row = _session_codes(user_df)
+    has_session = session_of_row >= 0
+    if session_ids.size == 0:
+        return float("nan")
+    session_of_row, added_ns = session_of_row[has_session], _added_ns(user_df)[has_session]
+    session_start = np.full(len(session_ids), np.iinfo(np.int64).max)
+    session_end = np.full(len(session_ids), np.iinfo(np.int64).min)
+    np.minimum.at(session_start, session_of_row, added_ns)
+    np.maximum.at(session_end, session_of_row, added_ns)
+
+    session_durations = session_end - session_start
+    avg_duration_seconds = float(session_durations.mean() / 1_000_000_000)
     return avg_duration_seconds
 
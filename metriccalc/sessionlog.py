@@ -2,10 +2,48 @@
 from __future__ import annotations
 
 from typing import Any, Dict, List
-from utils import parse_date
+from utils import _added_ns, _user_rows, parse_date
+import numpy as np
 import pandas as pd
 
-def generate_session_log(  # noqa: C901
+STRESS_HR_THRESHOLD = 100  # BPM to be considered "stressed"
+CALM_HR_THRESHOLD = 80  # BPM to be considered "calm" again
+ACTIVITY_SPEED_THRESHOLD = 1.0  # m/s to be considered "active"
+
+# Log entry emitted for an event, by entry kind: (event_type, event_description template)
+LOG_ENTRIES = [
+    ("FOCUS_LOST", "{user_name} lost focus on the page."),
+    ("FOCUS_GAINED", "{user_name} returned to the page."),
+    ("VIDEO_PAUSED", "Paused the video for {duration:.0f} seconds."),
+    ("VIDEO_SPEED_CHANGED", "Changed video speed to {speed}x."),
+    ("SCREEN_UNPINNED", "{user_name} unpinned the screen on their phone."),
+    ("WATCH_REMOVED", "{user_name} took off the smart watch."),
+    ("WEAK_SIGNAL", "A weak signal was detected, which may cause interruptions."),
+    ("STRESS_INCREASED", "Detected an elevated heart rate, indicating a rise in stress."),
+    ("STRESS_DECREASED", "Heart rate has returned to a normal level."),
+    ("BECAME_ACTIVE", "{user_name} became physically active (e.g., got up or started walking)."),
+    ("BECAME_SEDENTARY", "{user_name} is no longer physically active."),
+]
+# Description of a VIDEO_SPEED_CHANGED event that carries no speed
+UNKNOWN_SPEED_DESCRIPTION = "Changed video speed."
+
+
+def _state_changes(turn_on: np.ndarray, turn_off: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Replays a flag that starts off and is switched on/off by the rows in `turn_on`/`turn_off`.
+    Returns the rows where it actually switched on and where it actually switched off.
+    """
+    state = (
+        pd.Series(np.where(turn_on, 1.0, np.where(turn_off, 0.0, np.nan)))
+        .ffill()
+        .fillna(0.0)
+        .to_numpy()
+    )
+    before = np.concatenate(([0.0], state[:-1]))
+    return turn_on & (before == 0.0), turn_off & (before == 1.0)
+
+
+def generate_session_log(
         df: pd.DataFrame, user_id: str, session_id: int
 ) -> List[Dict[str, Any]]:
     """
@@ -21,122 +59,113 @@ def generate_session_log(  # noqa: C901
         log entry, ready to be sent to an API.
     """
     mask = (df["userId"] == user_id) & (df["sessionId"] == session_id)
-    session_df = df.loc[mask].sort_values("addedAt").reset_index(drop=True)
+    return _generate_session_log_from_slice(df.loc[mask], session_id)
+
+
+# Columns read by the log generator, extracted once as arrays
+LOG_COLUMNS = ["name", "type", "heartrate_change.mean", "physical.speed",
+               "video_paused.duration", "video_speed_changed.speed"]
+
+
+def _log_arrays(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """The LOG_COLUMNS of `df` plus its integer Unix timestamps in ms, as arrays."""
+    arrays = {column: df[column].to_numpy() for column in LOG_COLUMNS}
+    arrays["added_ms"] = _added_ns(df) // 1_000_000
+    return arrays
 
+
+def _generate_session_log_from_slice(
+        session_df: pd.DataFrame, session_id: int
+) -> List[Dict[str, Any]]:
+    """generate_session_log on the rows of one session, already selected by the caller."""
     if session_df.empty:
         return []
+    session_df = session_df.sort_values("addedAt", kind="stable")
+    return _session_log_entries(_log_arrays(session_df), session_id)
 
-    log_entries: List[Dict[str, Any]] = []
-    user_name = session_df["name"].iloc[0]
 
-    def _to_ms_timestamp(ts: pd.Timestamp) -> int:
-        """Converts a pandas Timestamp to an integer Unix timestamp in ms."""
-        return int(ts.value / 1_000_000)
+def _session_log_entries(
+        arrays: Dict[str, np.ndarray], session_id: int
+) -> List[Dict[str, Any]]:
+    """Log entries of one session, from the `_log_arrays` of its rows in chronological order."""
+    log_entries: List[Dict[str, Any]] = []
+    user_name = arrays["name"][0]
+    added_ms = arrays["added_ms"]
+    # Log entries carry the session id as a string, as SessionLogItem declares it
+    session_key = str(int(session_id))
 
     # --- Add SESSION_START event ---
-    start_time = session_df["addedAt"].min()
     log_entries.append({
-        "session_id": int(session_id),
+        "session_id": session_key,
         "user_name": user_name,
         "event_type": "SESSION_START",
         "event_description": f"{user_name} started a study session.",
-        "timestamp": _to_ms_timestamp(start_time),
+        "timestamp": int(added_ms.min()),
     })
 
-    # --- State tracking for aggregation ---
-    is_stressed = False
-    is_active = False
-    STRESS_HR_THRESHOLD = 100  # BPM to be considered "stressed"
-    CALM_HR_THRESHOLD = 80  # BPM to be considered "calm" again
-    ACTIVITY_SPEED_THRESHOLD = 1.0  # m/s to be considered "active"
-
-    # --- Process events chronologically ---
-    for _, row in session_df.iterrows():
-        event_type = row["type"]
-        timestamp = _to_ms_timestamp(row["addedAt"])
-        entry = None
-
-        # --- Direct Mappings ---
-        if event_type == "TAB_FOCUS_LOST":
-            entry = {
-                "event_type": "FOCUS_LOST",
-                "event_description": f"{user_name} lost focus on the page.",
-            }
-        elif event_type == "TAB_FOCUS_GAIN":
-            entry = {
-                "event_type": "FOCUS_GAINED",
-                "event_description": f"{user_name} returned to the page.",
-            }
-        elif event_type == "VIDEO_PAUSED" and row["video_paused.duration"] > 10:
-            duration = int(row["video_paused.duration"])
-            entry = {
-                "event_type": "VIDEO_PAUSED",
-                "event_description": f"Paused the video for {duration} seconds.",
-            }
-        elif event_type == "VIDEO_SPEED_CHANGED":
-            speed = row["video_speed_changed.speed"]
-            entry = {
-                "event_type": "VIDEO_SPEED_CHANGED",
-                "event_description": f"Changed video speed to {speed}x.",
-            }
-        elif event_type == "UNPIN_SCREEN":
-            entry = {
-                "event_type": "SCREEN_UNPINNED",
-                "event_description": f"{user_name} unpinned the screen on their phone.",
-            }
-        elif event_type == "WEARABLE_OFF":
-            entry = {
-                "event_type": "WATCH_REMOVED",
-                "event_description": f"{user_name} took off the smart watch.",
-            }
-        elif event_type == "WEAK_RSSI":
-            entry = {
-                "event_type": "WEAK_SIGNAL",
-                "event_description": "A weak signal was detected, which may cause interruptions.",
-            }
-
-        # --- Aggregated Mappings (State Changes) ---
-        elif event_type == "USER_HEARTRATE":
-            hr = row["heartrate_change.mean"]
-            if hr > STRESS_HR_THRESHOLD and not is_stressed:
-                is_stressed = True
-                entry = {
-                    "event_type": "STRESS_INCREASED",
-                    "event_description": "Detected an elevated heart rate, indicating a rise in stress.",
-                }
-            elif hr < CALM_HR_THRESHOLD and is_stressed:
-                is_stressed = False
-                entry = {
-                    "event_type": "STRESS_DECREASED",
-                    "event_description": "Heart rate has returned to a normal level.",
-                }
-        elif event_type == "USER_PHYSICAL_ACTIVITY":
-            speed = row["physical.speed"]
-            if speed > ACTIVITY_SPEED_THRESHOLD and not is_active:
-                is_active = True
-                entry = {
-                    "event_type": "BECAME_ACTIVE",
-                    "event_description": f"{user_name} became physically active (e.g., got up or started walking).",
-                }
-            elif speed < ACTIVITY_SPEED_THRESHOLD and is_active:
-                is_active = False
-                entry = {
-                    "event_type": "BECAME_SEDENTARY",
-                    "event_description": f"{user_name} is no longer physically active.",
-                }
-
-        if entry:
-            entry.update({"session_id":int(session_id),"user_name": user_name, "timestamp": timestamp})
-            log_entries.append(entry)
+    # --- Kind of log entry (index into LOG_ENTRIES) of every event, -1 for none ---
+    event_type = arrays["type"]
+    heartrate = arrays["heartrate_change.mean"]
+    activity_speed = arrays["physical.speed"]
+    pause_duration = arrays["video_paused.duration"]
+    video_speed = arrays["video_speed_changed.speed"]
+
+    # Aggregated mappings: heart rate and activity only log when their state changes
+    is_heartrate = event_type == "USER_HEARTRATE"
+    stress_increased, stress_decreased = _state_changes(
+        is_heartrate & (heartrate > STRESS_HR_THRESHOLD),
+        is_heartrate & (heartrate < CALM_HR_THRESHOLD),
+    )
+    is_activity = event_type == "USER_PHYSICAL_ACTIVITY"
+    became_active, became_sedentary = _state_changes(
+        is_activity & (activity_speed > ACTIVITY_SPEED_THRESHOLD),
+        is_activity & (activity_speed < ACTIVITY_SPEED_THRESHOLD),
+    )
+
+    entry_kind = np.select(
+        [
+            event_type == "TAB_FOCUS_LOST",
+            event_type == "TAB_FOCUS_GAIN",
+            (event_type == "VIDEO_PAUSED") & (pause_duration > 10),
+            event_type == "VIDEO_SPEED_CHANGED",
+            event_type == "UNPIN_SCREEN",
+            event_type == "WEARABLE_OFF",
+            event_type == "WEAK_RSSI",
+            stress_increased,
+            stress_decreased,
+            became_active,
+            became_sedentary,
+        ],
+        range(len(LOG_ENTRIES)),
+        default=-1,
+    )
+
+    # --- Materialize only the rows that emit an entry, chronologically ---
+    for position in np.flatnonzero(entry_kind >= 0):
+        log_type, description = LOG_ENTRIES[entry_kind[position]]
+        speed = video_speed[position]
+        if log_type == "VIDEO_SPEED_CHANGED" and pd.isna(speed):
+            description = UNKNOWN_SPEED_DESCRIPTION
+        log_entries.append({
+            "event_type": log_type,
+            "event_description": description.format(
+                user_name=user_name,
+                duration=np.trunc(pause_duration[position]),
+                # str() prints the shortest repr of the stored precision, 1.3 rather than 1.2999999523162842
+                speed=str(speed),
+            ),
+            "session_id": session_key,
+            "user_name": user_name,
+            "timestamp": int(added_ms[position]),
+        })
 
     # --- Add SESSION_END event ---
-    end_time = session_df["addedAt"].max()
     log_entries.append({
-        "session_id":int(session_id),
+        "session_id": session_key,
         "user_name": user_name,
         "event_type": "SESSION_END",
         "event_description": f"{user_name} ended the study session.",
-        "timestamp": _to_ms_timestamp(end_time),
+        "timestamp": int(added_ms.max()),
     })
 
     return log_entries
@@ -149,19 +178,33 @@ def get_all_logs(
     Generates logs for all sessions of a user within a date range.
     Returns a list of session logs.
     """
-    mask = (df["userId"] == user_id) & (
-            df["addedAt"] >= parse_date(start_date)
-    ) & (df["addedAt"] < parse_date(end_date) + pd.Timedelta(days=1))
-    user_df = df.loc[mask]
+    user_df = _user_rows(df, user_id)
+    mask = (user_df["addedAt"] >= parse_date(start_date)) & (
+            user_df["addedAt"] < parse_date(end_date) + pd.Timedelta(days=1)
+    )
+    return get_all_logs_no_filter(user_df.loc[mask])
+
+
+def get_all_logs_no_filter(user_df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """get_all_logs on the user's rows in the period, already selected by the caller."""
+    user_df = user_df[user_df["sessionId"].notna()]
 
     if user_df.empty:
         return []
 
-    session_ids = user_df["sessionId"].unique()
+    # One sort puts every session's rows next to each other in chronological order, so each
+    # session is a slice of the column arrays extracted once
+    session_order = pd.unique(user_df["sessionId"])
+    user_df = user_df.sort_values(["sessionId", "addedAt"], kind="stable")
+    arrays = _log_arrays(user_df)
+    sorted_sessions = user_df["sessionId"].to_numpy()
+    starts = np.searchsorted(sorted_sessions, session_order, side="left")
+    ends = np.searchsorted(sorted_sessions, session_order, side="right")
+
+    # Sessions in order of first appearance
     all_logs = []
-    for session_id in session_ids:
-        log = generate_session_log(user_df, user_id, session_id)
-        if log:
-            all_logs.extend(log)
+    for session_id, start, end in zip(session_order, starts, ends):
+        session_arrays = {column: values[start:end] for column, values in arrays.items()}
+        all_logs.extend(_session_log_entries(session_arrays, session_id))
 
     return all_logs
@@ -3,88 +3,40 @@ from typing import Dict, Any, List
 
 import numpy as np
 import pandas as pd
-from utils import parse_date
+from utils import _added_ns, _session_codes, _type_codes, _user_rows, parse_date
 
 
-# ----------------------------- helpers ------------------------- #
-def _clamp(x: float, lo: float = 0.0, hi: float = 1.0) -> float:
-    return max(lo, min(hi, x))
-
-
-# ------------------- metric functions (1 per weight) ----------- #
-# Each function returns a score from 0 (calm) to 1 (stressed)
-
-def _metric_stress_heartrate(df: pd.DataFrame) -> float:
-    """
-    Scales the average heart rate to a 0-1 stress score.
-    Assumes a baseline of 75bpm (calm) and a high of 110bpm (stressed).
-    """
-    if df.empty:
-        return 0.0
-    # Use the mean heartrate reported by the device
-    avg_hr = df["heartrate_change.mean"].mean()
-    baseline_hr = 75.0
-    high_hr = 110.0
-    score = (avg_hr - baseline_hr) / (high_hr - baseline_hr)
-    return _clamp(score)
+# Weight of each metric in a session's stress level
+STRESS_WEIGHTS: Dict[str, float] = {
+    "heartrate": 0.40,
+    "activity": 0.15,
+    "scrolling": 0.15,
+    "jumping": 0.10,
+    "focus_loss": 0.20,
+}
+STRESS_WEIGHT_VECTOR = np.fromiter(STRESS_WEIGHTS.values(), dtype=np.float64)
 
 
-def _metric_stress_activity(df: pd.DataFrame, thresh: float = 1.0) -> float:
-    """
-    Returns the percentage of time the user was moving faster than the
-    sedentary threshold (e.g., walking/pacing).
-    """
-    if df.empty:
-        return 0.0
-    high_speed_events = (df["physical.speed"] > thresh).sum()
-    return high_speed_events / len(df)
-
+# ----------------------------- helpers ------------------------- #
+def _clamp(x: np.ndarray, lo: float = 0.0, hi: float = 1.0) -> np.ndarray:
+    # Like max(lo, min(hi, x)) per element, which also maps NaN to `hi`
+    return np.where(np.isnan(x), hi, np.clip(x, lo, hi))
 
-def _metric_stress_scrolling(df: pd.DataFrame) -> float:
-    """
-    Uses the Coefficient of Variation (CV) of scroll distances.
-    A high CV (erratic scrolling) maps to a higher stress score.
-    A CV of 1.5 or more is considered max stress.
-    """
-    if len(df) < 2:
-        return 0.0
-    dists = df["text_scroll.distance"].to_numpy(float)
-    std = dists.std(ddof=1)
-    mean = dists.mean()
-    if mean == 0:
-        return 0.0
-    cv = std / mean
-    # Scale the CV so that 1.5 maps to a score of 1.0
-    return _clamp(cv / 1.5)
-
-
-def _metric_stress_video_jump(
-        df: pd.DataFrame, duration_minutes: float
-) -> float:
-    """
-    Calculates stress based on the frequency of video jumps.
-    More than 1.5 jumps/minute is considered high stress.
-    """
-    if df.empty or duration_minutes == 0:
-        return 0.0
-    jumps_per_minute = len(df) / duration_minutes
-    # Scale the frequency, where 1.5 jumps/min is max stress
-    return _clamp(jumps_per_minute / 1.5)
 
+# ------------------- metric thresholds (1 per weight) ----------- #
+# Each metric is a score from 0 (calm) to 1 (stressed), computed for every session at once
 
-def _metric_stress_tab_focus(
-        df: pd.DataFrame, duration_minutes: float
-) -> float:
-    """
-    Calculates stress based on the frequency of losing tab focus.
-    More than 1 focus loss event/minute is considered high stress.
-    """
-    if duration_minutes == 0:
-        return 0.0
-    losses = (df["type"] == "TAB_FOCUS_LOST").sum()
-    losses_per_minute = losses / duration_minutes
-    # Scale the frequency, where 1 loss/min is max stress
-    return _clamp(losses_per_minute / 1.0)
+# Heart rate is scaled from a baseline of 75bpm (calm) to a high of 110bpm (stressed)
+BASELINE_HR = 75.0
+HIGH_HR = 110.0
+# Moving faster than this counts as active (e.g., walking/pacing)
+ACTIVITY_SPEED_THRESHOLD = 1.0
+# A scroll distance Coefficient of Variation of 1.5 or more is max stress
+MAX_SCROLL_CV = 1.5
+# 1.5 video jumps per minute is max stress
+MAX_JUMPS_PER_MINUTE = 1.5
+# 1 tab focus loss per minute is max stress
+MAX_FOCUS_LOSSES_PER_MINUTE = 1.0
 
 
 def stress_report(
@@ -97,63 +49,116 @@ def stress_report(
     start = parse_date(date_from)
     end = parse_date(date_to)
 
-    print("COLUMNAS DE EL DATAFRAME", df.columns)
+    user_df = _user_rows(df, user_id)
     mask = (
-            (df["user_id"] == user_id)
-            & (df["addedAt"] >= start)
-            & (df["addedAt"] <= end)
+            (user_df["user_id"] == user_id)
+            & (user_df["addedAt"] >= start)
+            & (user_df["addedAt"] <= end)
     )
-    dfx = df.loc[mask].copy()
+    dfx = user_df.loc[mask]
     if dfx.empty:
         # Return a default structure if no data is found
         return {"stress": 0.0, "sub_stress": []}
     return stress_score_(dfx)
 
 def stress_score_(dfx: pd.DataFrame) -> Dict[str, Any]:
-    sub_stress_list: List[Dict[str, Any]] = []
-    session_stress_levels: List[float] = []
-    weights: Dict[str, float] = {
-        "heartrate": 0.40,
-        "activity": 0.15,
-        "scrolling": 0.15,
-        "jumping": 0.10,
-        "focus_loss": 0.20,
+    has_session = dfx["sessionId"].notna()
+    if not has_session.all():
+        dfx = dfx[has_session]
+    # Session number of every row, every metric is then a handful of per-session bincounts
+    session_ids, session_of_row = _session_codes(dfx)
+    n_sessions = len(session_ids)
+    type_codes, type_code = _type_codes(dfx)
+
+    def is_type(event_type: str) -> np.ndarray:
+        return type_codes == type_code.get(event_type, -2)
+
+    def per_session(mask: np.ndarray, values: np.ndarray | None = None) -> np.ndarray:
+        weights = None if values is None else values[mask]
+        return np.bincount(session_of_row[mask], weights=weights, minlength=n_sessions)
+
+    added_ns = _added_ns(dfx)
+    session_start = np.full(n_sessions, np.iinfo(np.int64).max)
+    session_end = np.full(n_sessions, np.iinfo(np.int64).min)
+    np.minimum.at(session_start, session_of_row, added_ns)
+    np.maximum.at(session_end, session_of_row, added_ns)
+    duration_minutes = (session_end - session_start) / 60_000_000_000
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Heart rate: average of the mean heartrate reported by the device
+        is_hr = is_type("USER_HEARTRATE")
+        mean_hr = dfx["heartrate_change.mean"].to_numpy(np.float64)
+        has_hr = is_hr & ~np.isnan(mean_hr)
+        avg_hr = per_session(has_hr, mean_hr) / per_session(has_hr)
+        heartrate = np.where(
+            per_session(is_hr) == 0, 0.0, _clamp((avg_hr - BASELINE_HR) / (HIGH_HR - BASELINE_HR))
+        )
+
+        # Activity: share of activity events faster than the sedentary threshold
+        is_activity = is_type("USER_PHYSICAL_ACTIVITY")
+        speed = dfx["physical.speed"].to_numpy(np.float64)
+        activity_events = per_session(is_activity)
+        activity = np.where(
+            activity_events == 0,
+            0.0,
+            per_session(is_activity & (speed > ACTIVITY_SPEED_THRESHOLD)) / activity_events,
+        )
+
+        # Scrolling: Coefficient of Variation of the scroll distances, erratic scrolling is stress
+        is_scroll = is_type("TEXT_SCROLL")
+        distance = dfx["text_scroll.distance"].to_numpy(np.float64)
+        scroll_events = per_session(is_scroll)
+        mean_distance = per_session(is_scroll, distance) / scroll_events
+        squared_deviation = (distance - mean_distance[session_of_row]) ** 2
+        std_distance = np.sqrt(per_session(is_scroll, squared_deviation) / (scroll_events - 1))
+        scrolling = np.where(
+            (scroll_events < 2) | (mean_distance == 0),
+            0.0,
+            _clamp(std_distance / mean_distance / MAX_SCROLL_CV),
+        )
+
+        # Jumping and focus loss: event frequency per minute of session
+        jumps = per_session(is_type("VIDEO_JUMP"))
+        jumping = np.where(
+            (jumps == 0) | (duration_minutes == 0),
+            0.0,
+            _clamp(jumps / duration_minutes / MAX_JUMPS_PER_MINUTE),
+        )
+        losses = per_session(is_type("TAB_FOCUS_LOST"))
+        focus_loss = np.where(
+            duration_minutes == 0, 0.0, _clamp(losses / duration_minutes / MAX_FOCUS_LOSSES_PER_MINUTE)
+        )
+
+    metric_columns = {
+        "heartrate": heartrate,
+        "activity": activity,
+        "scrolling": scrolling,
+        "jumping": jumping,
+        "focus_loss": focus_loss,
     }
-
-    for session_id, g in dfx.groupby("sessionId"):
-        session_start = g["addedAt"].min()
-        session_end = g["addedAt"].max()
-        duration_minutes = (session_end - session_start).total_seconds() / 60.0
-
-        # Break out event-specific frames
-        f_hr = g[g["type"] == "USER_HEARTRATE"]
-        f_activity = g[g["type"] == "USER_PHYSICAL_ACTIVITY"]
-        f_scroll = g[g["type"] == "TEXT_SCROLL"]
-        f_jump = g[g["type"] == "VIDEO_JUMP"]
-
-        metrics = {
-            "heartrate": _metric_stress_heartrate(f_hr),
-            "activity": _metric_stress_activity(f_activity),
-            "scrolling": _metric_stress_scrolling(f_scroll),
-            "jumping": _metric_stress_video_jump(f_jump, duration_minutes),
-            "focus_loss": _metric_stress_tab_focus(g, duration_minutes),
-        }
-
-        stress_level = sum(metrics[k] * w for k, w in weights.items())
-        session_stress_levels.append(stress_level)
-
-        # Build the dictionary for this specific session
-        session_data = {
+    # Stress level of every session at once: (sessions x metrics) @ weights
+    metric_matrix = np.column_stack([metric_columns[k] for k in STRESS_WEIGHTS])
+    session_stress_levels = metric_matrix @ STRESS_WEIGHT_VECTOR
+    session_metrics: List[Dict[str, float]] = [
+        dict(zip(STRESS_WEIGHTS, row)) for row in metric_matrix.tolist()
+    ]
+
+    # Build the dictionary for each session
+    sub_stress_list: List[Dict[str, Any]] = [
+        {
             "session_id": session_id,
             "stress_level": stress_level,
             # Add individual metrics with uppercase keys
             **{key.upper(): value for key, value in metrics.items()},
         }
-        sub_stress_list.append(session_data)
+        for session_id, stress_level, metrics in zip(
+            session_ids.tolist(), session_stress_levels.tolist(), session_metrics
+        )
+    ]
 
     # Calculate the overall average stress for the period
     overall_stress = (
-        float(np.mean(session_stress_levels)) if session_stress_levels else 0.0
+        float(session_stress_levels.mean()) if len(session_stress_levels) else 0.0
     )
 
     # Construct the final output dictionary
@@ -1,35 +1,14 @@
-from typing import Dict, Optional, List
+from typing import Dict, Optional
 import pandas as pd
-from pydantic import BaseModel
 from apiClient import APIClient
 from metriccalc.concentration import get_concentration_score_no_filter
 from metriccalc.stress import stress_score_
+from models import DailyConcentration, Student, TeacherReport
 
-# 1. Define the Pydantic models for the output structure
-class Student(BaseModel):
-    user_id: str
-    fullname: str
-    completion_percentage: float
-    concentration_score: float
-    stress_score: float
+DAY_NS = 86_400_000_000_000
 
 
-class DailyConcentration(BaseModel):
-    date: str
-    courseId: int
-    course_title: str
-    concentration_score: float
-
-
-class TeacherReport(BaseModel):
-    avg_time_course: float # decimal
-    students_table: List[Student]
-    completed_course: float
-    total_sessions: int
-    concentration_per_course_and_day: List[DailyConcentration]
-
-
-# 2. Update the function to return the TeacherReport model
+# Builds the TeacherReport model (see models.py)
 async def get_teacher_report(
         api: APIClient,
         df: pd.DataFrame,
@@ -56,7 +35,7 @@ async def get_teacher_report(
     if end_date:
         df = df[df["addedAt"] <= end_date]
 
-    df_filtered = df[df["teacher_id"] == teacher_id].copy()
+    df_filtered = df[df["teacher_id"] == teacher_id]
 
     if df_filtered.empty:
         # Return a default report if no data is found
@@ -82,13 +61,19 @@ async def get_teacher_report(
     else:
         students_progress = pd.DataFrame(columns=["user_id", "completion_percentage"])
 
-    concentration = (
-        df_filtered.groupby("user_id")
-        .apply(
-            lambda g: get_concentration_score_no_filter(g, g)["concentration_score"],
-            include_groups=False,
-        )
-        .reset_index(name="concentration_score")
+    # Score every session once, against its own user's history. The per-student and the
+    # per-course-and-day concentration are both averages of these session scores.
+    # Reports of users unknown to the API have no user_id, they only count per course and day.
+    user_concentration: Dict[str, float] = {}
+    session_scores: Dict[tuple, float] = {}
+    for user_id, g in df_filtered.groupby("userId"):
+        result = get_concentration_score_no_filter(g, g)
+        if pd.notna(g["user_id"].iloc[0]):
+            user_concentration[user_id] = result["concentration_score"]
+        for session_id, score in result["session_scores"].items():
+            session_scores[(user_id, session_id)] = score
+    concentration = pd.DataFrame(
+        {"user_id": list(user_concentration), "concentration_score": list(user_concentration.values())}
     )
     stress = (
         df_filtered.groupby("user_id")
@@ -120,23 +105,32 @@ async def get_teacher_report(
     completed_course = students_table_df["completion_percentage"].mean()
     total_sessions = df_filtered["sessionId"].nunique()
 
-    session_times = df_filtered.groupby(["sessionId", "course_id"])["addedAt"].apply(
-        lambda x: x.max() - x.min()
-    )
+    session_times = df_filtered.groupby(["sessionId", "course_id"])["addedAt"].agg(["min", "max"])
+    session_durations = session_times["max"] - session_times["min"]
     avg_time_course = (
         0
-        if session_times.empty
-        else session_times.groupby("course_id").sum().mean().total_seconds()
+        if session_durations.empty
+        else session_durations.groupby("course_id").sum().mean().total_seconds()
     )
 
-    df_filtered["date"] = df_filtered["addedAt"].dt.strftime("%d-%m-%Y")
+    # Integer local day of every event; only the days in the result get formatted as dates
+    local_ns = df_filtered["addedAt"].dt.tz_localize(None).to_numpy().view("int64")
+    cell_sessions = (
+        df_filtered[["courseId", "userId", "sessionId"]]
+        .assign(day=local_ns // DAY_NS)
+        .drop_duplicates()
+    )
+    cell_sessions["concentration_score"] = [
+        session_scores.get(key, float("nan"))
+        for key in zip(cell_sessions["userId"], cell_sessions["sessionId"])
+    ]
     concentration_results = (
-        df_filtered.groupby(["date", "courseId"])
-        .apply(
-            lambda g: get_concentration_score_no_filter(g, g)["concentration_score"],
-            include_groups=False,
-        )
-        .reset_index(name="concentration_score")
+        cell_sessions.groupby(["day", "courseId"])["concentration_score"]
+        .mean()
+        .reset_index()
+    )
+    concentration_results.insert(
+        0, "date", pd.to_datetime(concentration_results.pop("day") * DAY_NS).dt.strftime("%d-%m-%Y")
     )
 
     courses = await api.request(endpoint="/course", query={"teacher_id": f"eq.{teacher_id}"})
@@ -1,32 +1,26 @@
-from typing import List
+from dataclasses import dataclass
+from typing import Annotated, List
 
-from pydantic import Field, BaseModel
+from pydantic import ConfigDict, Field, BaseModel
 
 
 # --- Focus/Concentration Report Models ---
-class FocusDetails(BaseModel):
-    session_id: int = Field(..., description="ID of the session")
-    text_scroll: float = Field(
-        ..., description="Text scroll concentration score"
-    )
-    video_jump: float = Field(..., description="Video jump concentration score")
-    video_pause: float = Field(
-        ..., description="Video pause concentration score"
-    )
-    video_speed: float = Field(
-        ..., description="Video speed concentration score"
-    )
-    tab_focus: float = Field(..., description="Tab focus concentration score")
-    physical_activity: float = Field(
-        ..., description="Physical activity concentration score"
-    )
-    weak_signal: float = Field(
-        ..., description="Weak signal concentration score"
-    )
-    watch_off: float = Field(..., description="Watch off concentration score")
+@dataclass(slots=True, frozen=True)
+class FocusDetails:
+    session_id: Annotated[int, Field(description="ID of the session")]
+    text_scroll: Annotated[float, Field(description="Text scroll concentration score")]
+    video_jump: Annotated[float, Field(description="Video jump concentration score")]
+    video_pause: Annotated[float, Field(description="Video pause concentration score")]
+    video_speed: Annotated[float, Field(description="Video speed concentration score")]
+    tab_focus: Annotated[float, Field(description="Tab focus concentration score")]
+    physical_activity: Annotated[float, Field(description="Physical activity concentration score")]
+    weak_signal: Annotated[float, Field(description="Weak signal concentration score")]
+    watch_off: Annotated[float, Field(description="Watch off concentration score")]
 
 
 class FocusReport(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     focus_score: float = Field(
         ..., description="Overall concentration score for the user"
     )
@@ -34,31 +28,20 @@ class FocusReport(BaseModel):
         ..., description="Detailed focus metrics per session"
     )
 # --- Stress Report Models ---
-class StressDetails(BaseModel):
-    session_id: int = Field(
-        ..., description="Unique identifier for the monitoring session"
-    )
-    stress_level: float = Field(
-        ..., description="The calculated stress score for this session (0-1)"
-    )
-    heartrate: float = Field(
-        ..., description="Heart rate contribution to stress (0-1)"
-    )
-    activity: float = Field(
-        ..., description="Physical activity contribution to stress (0-1)"
-    )
-    scrolling: float = Field(
-        ..., description="Erratic scrolling contribution to stress (0-1)"
-    )
-    jumping: float = Field(
-        ..., description="Video jumping contribution to stress (0-1)"
-    )
-    focus_loss: float = Field(
-        ..., description="Tab focus loss contribution to stress (0-1)"
-    )
+@dataclass(slots=True, frozen=True)
+class StressDetails:
+    session_id: Annotated[int, Field(description="Unique identifier for the monitoring session")]
+    stress_level: Annotated[float, Field(description="The calculated stress score for this session (0-1)")]
+    heartrate: Annotated[float, Field(description="Heart rate contribution to stress (0-1)")]
+    activity: Annotated[float, Field(description="Physical activity contribution to stress (0-1)")]
+    scrolling: Annotated[float, Field(description="Erratic scrolling contribution to stress (0-1)")]
+    jumping: Annotated[float, Field(description="Video jumping contribution to stress (0-1)")]
+    focus_loss: Annotated[float, Field(description="Tab focus loss contribution to stress (0-1)")]
 
 
 class StressReport(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     overall_stress: float = Field(
         ..., description="Overall stress score for the user for the period"
     )
@@ -67,27 +50,57 @@ class StressReport(BaseModel):
     )
 
 # --- Session Log Models ---
-class SessionLogItem(BaseModel):
-    session_id: str = Field(
-        ..., description="Unique identifier for the monitoring session"
-    )
-    user_name: str = Field(..., description="Name of the user")
-    event_type: str = Field(
-        ..., description="Type of event (e.g., 'VIDEO_PLAY', 'TEXT_SCROLL')"
-    )
-    description: str = Field(..., description="Description of the event")
-    timestamp: int = Field(..., description="Timestamp in Unix milliseconds")
+@dataclass(slots=True, frozen=True)
+class SessionLogItem:
+    session_id: Annotated[str, Field(description="Unique identifier for the monitoring session")]
+    user_name: Annotated[str, Field(description="Name of the user")]
+    event_type: Annotated[str, Field(description="Type of event (e.g., 'VIDEO_PLAY', 'TEXT_SCROLL')")]
+    description: Annotated[str, Field(description="Description of the event")]
+    timestamp: Annotated[int, Field(description="Timestamp in Unix milliseconds")]
 
 
 class SessionLogReport(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     logs: List[SessionLogItem] = Field(
         ..., description="List of session logs for the user"
     )
 
 class UserReport(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     session_count: int = Field(..., description="Number of sessions")
     average_session_time: float = Field(..., description="Average session time in seconds")
     focus_report: FocusReport = Field(..., description="Concentration report for the user")
     stress_report: StressReport = Field(..., description="Stress report for the user")
     session_log: SessionLogReport = Field(..., description="Session log report for the user")
 
+
+# --- Teacher Report Models ---
+class Student(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    user_id: str
+    fullname: str
+    completion_percentage: float
+    concentration_score: float
+    stress_score: float
+
+
+class DailyConcentration(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    date: str
+    courseId: int
+    course_title: str
+    concentration_score: float
+
+
+class TeacherReport(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    avg_time_course: float # decimal
+    students_table: List[Student]
+    completed_course: float
+    total_sessions: int
+    concentration_per_course_and_day: List[DailyConcentration]
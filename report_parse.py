@@ -1,6 +1,10 @@
 # filename: report_parser.py
 # --------------------------------------------------------------- #
-from typing import Any, Dict, List
+import os
+from operator import itemgetter
+from typing import Any, Callable, Dict, List, Tuple, get_type_hints
+from pydantic import TypeAdapter
+from pydantic_core import ArgsKwargs
 from models import (
     FocusDetails,
     FocusReport,
@@ -10,6 +14,43 @@ from models import (
     StressReport,
 )
 
+# The raw reports come from our own analysis functions, so the report containers are built with
+# model_construct and skip validation. Set VALIDATE_REPORTS=1 (e.g. in tests) to validate them.
+# Per-session items are always validated, in bulk, which is cheaper than a model_construct per item.
+VALIDATE_REPORTS = os.getenv("VALIDATE_REPORTS") == "1"
+
+
+def _build(model, **data):
+    """Instance of `model` from already-cast `data`, validated only when VALIDATE_REPORTS is set."""
+    if VALIDATE_REPORTS:
+        return model(**data)
+    return model.model_construct(**data)
+
+
+def _key_map(model: type) -> Dict[str, Tuple[str, Callable]]:
+    """
+    Raw report key -> (field of `model`, cast to its type), for the raw keys in either case.
+    """
+    casts = get_type_hints(model)
+    return {
+        **{field.upper(): (field, cast) for field, cast in casts.items()},
+        **{field: (field, cast) for field, cast in casts.items()},
+    }
+
+
+# Precomputed so the per-session keys are a dict lookup instead of a .lower() per field
+_FOCUS_KEY_MAP = _key_map(FocusDetails)
+
+# The stress analysis always emits these keys, read in StressDetails' field order
+_STRESS_DETAILS_VALUES = itemgetter(
+    "session_id", "stress_level", "HEARTRATE", "ACTIVITY", "SCROLLING", "JUMPING", "FOCUS_LOSS"
+)
+
+# Per-session lists are validated in one call each, pydantic-core loops over the items
+_SESSION_LOG_LIST = TypeAdapter(List[SessionLogItem])
+_STRESS_DETAILS_LIST = TypeAdapter(List[StressDetails])
+_FOCUS_DETAILS_LIST = TypeAdapter(List[FocusDetails])
+
 # Assume your analysis functions are in these files
 # from stress import stress_report
 # from concentration import get_concentration_score
@@ -20,47 +61,50 @@ def _parse_session_log(
         raw_data: List[Dict[str, Any]]
 ) -> SessionLogReport:
     """Parses raw log data into a SessionLogReport Pydantic model."""
-    parsed_logs = [
-        SessionLogItem(
-            session_id=str(item.get("session_id")),
-            user_name=item.get("user_name"),
-            event_type=item.get("event_type"),
-            description=item.get("event_description"), # Key mapping
-            timestamp=item.get("timestamp"),
-        )
+    # Positional rows in SessionLogItem's field order, with the types already converted
+    parsed_logs = _SESSION_LOG_LIST.validate_python([
+        ArgsKwargs((
+            item["session_id"],
+            item["user_name"],
+            item["event_type"],
+            item["event_description"], # Key mapping
+            int(item["timestamp"]),
+        ))
         for item in raw_data
-    ]
-    return SessionLogReport(logs=parsed_logs)
+    ])
+    return _build(SessionLogReport, logs=parsed_logs)
+
+
+def _details_data(key_map: Dict[str, Tuple[str, Callable]], item: Dict[str, Any]) -> Dict[str, Any]:
+    """One session's raw metrics with lowercase keys and values cast to the field types."""
+    details_data = {}
+    for key, value in item.items():
+        field, cast = key_map.get(key) or (key.lower(), float)
+        details_data[field] = cast(value)
+    return details_data
 
 
 def _parse_stress_report(raw_data: Dict[str, Any]) -> StressReport:
     """Parses raw stress data into a StressReport Pydantic model."""
-    parsed_details = []
-    for item in raw_data.get("sub_stress", []):
-        # Create a new dict with lowercase keys to match the Pydantic model
-        details_data = {key.lower(): float(value) for key, value in item.items()}
-        parsed_details.append(StressDetails(**details_data))
-
-    return StressReport(
-        overall_stress=float(raw_data.get("stress", 0.0)),
+    parsed_details = _STRESS_DETAILS_LIST.validate_python([
+        ArgsKwargs(_STRESS_DETAILS_VALUES(item)) for item in raw_data["sub_stress"]
+    ])
+
+    return _build(
+        StressReport,
+        overall_stress=float(raw_data["stress"]),
         session_details=parsed_details,
     )
 
 
 def _parse_focus_report(raw_data: Dict[str, Any]) -> FocusReport:
     """Parses raw concentration data into a FocusReport Pydantic model."""
-    parsed_details = []
-    for item in raw_data.get("sub_scores", []):
-        # Normalize keys to lowercase and cast values to float
-        details_data = {
-            key.lower().replace("session_id", "session_id"): float(value)
-            for key, value in item.items()
-        }
-        # Pydantic needs 'session_id', not 'session_id'
-        details_data["session_id"] = str(details_data.pop("session_id"))
-        parsed_details.append(FocusDetails(**details_data))
-
-    return FocusReport(
+    parsed_details = _FOCUS_DETAILS_LIST.validate_python([
+        _details_data(_FOCUS_KEY_MAP, item) for item in raw_data.get("sub_scores", [])
+    ])
+
+    return _build(
+        FocusReport,
         focus_score=float(raw_data.get("concentration_score", 0.0)),
         focus_details=parsed_details,
     )
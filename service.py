@@ -1,51 +1,69 @@
+from functools import lru_cache
 from typing import List
 
 import pandas as pd
+import dataframeloader as df_loader
 from pydantic import BaseModel, Field
-from metriccalc.stress import stress_report
-from metriccalc.concentration import  get_concentration_score
-from metriccalc.sessionlog import generate_session_log, get_all_logs
-from metriccalc.session_summary import get_number_of_sessions, get_average_session_time
+from metriccalc.stress import stress_score_
+from metriccalc.concentration import get_concentration_score_for_period
+from metriccalc.sessionlog import get_all_logs_no_filter
+from metriccalc.session_summary import get_number_of_sessions_no_filter, get_average_session_time_no_filter
 from models import UserReport
-from report_parse import _parse_stress_report, _parse_focus_report, _parse_session_log
+from report_parse import _build, _parse_stress_report, _parse_focus_report, _parse_session_log
 from utils import _filter_data
 
 
 def get_user_report(
-        df: pd.DataFrame, user_id: str, start_date: str, end_date: str
+        df: pd.DataFrame, user_id: str, start_date: pd.Timestamp, end_date: pd.Timestamp, type_rows=None
 ) -> UserReport:
     """
     Generates and parses a full user report into Pydantic models.
 
     NOTE: This function assumes you have the analysis functions
     (stress_report, get_concentration_score, generate_session_log)
-    available in the scope.
+    available in the scope. Dates come already parsed, see main.ReportQuery.
     """
     # 1. Generate raw data from your analysis functions
-    # These would be the actual function calls
+    # The user's rows in the period are selected once and every analysis runs on them
 
     filtered = _filter_data(df, user_id, start_date, end_date)
     if filtered.empty:
         raise ValueError(f"No data found for user {user_id} between {start_date} and {end_date}")
 
-
-    print("Generating raw stress report...✅", df.columns)
-    raw_stress = stress_report(df, user_id, start_date, end_date)
-    raw_concentration = get_concentration_score(df, user_id, start_date, end_date)
-    raw_logs = get_all_logs(df, user_id, start_date, end_date)
+    raw_stress = stress_score_(filtered)
+    raw_concentration = get_concentration_score_for_period(df, user_id, filtered, type_rows)
+    raw_logs = get_all_logs_no_filter(filtered)
 
     # 2. Parse the raw data into Pydantic models
     stress_model = _parse_stress_report(raw_stress)
     focus_model = _parse_focus_report(raw_concentration)
     log_model = _parse_session_log(raw_logs)
-    session_count = get_number_of_sessions(df, user_id, start_date, end_date)
-    average_session_time = get_average_session_time(df, user_id, start_date, end_date)
+    session_count = get_number_of_sessions_no_filter(filtered)
+    average_session_time = get_average_session_time_no_filter(filtered)
 
     # 3. Assemble the final report
-    return UserReport(
-        session_count=session_count,
-        average_session_time=average_session_time,
+    return _build(
+        UserReport,
+        session_count=int(session_count),
+        average_session_time=float(average_session_time),
         stress_report=stress_model,
         focus_report=focus_model,
         session_log=log_model,
-    )
\ No newline at end of file
+    )
+
+
+@lru_cache(maxsize=4096)
+def _get_user_report_json_cached(
+        user_id: str, start_date: pd.Timestamp, end_date: pd.Timestamp, version: int
+) -> bytes:
+    """
+    get_user_report on the current lake, serialized to JSON and memoized per lake version.
+    The lake only changes on refresh, so entries for an older version are never hit again
+    and age out of the cache. Caching the encoded report also saves the serialization on hits.
+    """
+    report = get_user_report(df_loader.lake, user_id, start_date, end_date, df_loader.lake_type_rows)
+    return report.model_dump_json().encode()
+
+
+def get_user_report_json_cached(user_id: str, start_date: pd.Timestamp, end_date: pd.Timestamp) -> bytes:
+    return _get_user_report_json_cached(user_id, start_date, end_date, df_loader.lake_version)
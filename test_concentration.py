@@ -0,0 +1,95 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from metriccalc.concentration import METRIC_WEIGHTS, get_concentration_score_no_filter
+
+START = pd.Timestamp("2025-06-23 10:00", tz="America/Bogota")
+COLUMNS = ["text_scroll.distance", "text_scroll.direction", "video_paused.duration",
+           "video_speed_changed.speed", "physical.speed", "weak_rssi.value"]
+TIME_COLUMNS = {"TAB_FOCUS_LOST": "focus_lost.time", "TAB_FOCUS_GAIN": "focus_gain.time"}
+
+
+def _events(*events: tuple) -> pd.DataFrame:
+    """
+    Rows from (session, second, type, {column: value}) tuples, metric columns NaN unless given.
+    Focus events carry their own time, equal to the row's.
+    """
+    rows = []
+    for session, second, event_type, values in events:
+        added_at = START + pd.Timedelta(seconds=second)
+        row = {"sessionId": session, "addedAt": added_at, "type": event_type,
+               **dict.fromkeys(COLUMNS, np.nan), "focus_lost.time": pd.NaT, "focus_gain.time": pd.NaT, **values}
+        if event_type in TIME_COLUMNS:
+            row[TIME_COLUMNS[event_type]] = added_at
+        rows.append(row)
+    return pd.DataFrame(rows, columns=["sessionId", "addedAt", "type", *COLUMNS, *TIME_COLUMNS.values()])
+
+
+def _sub_scores(result: dict) -> dict:
+    return {sub_scores.pop("SESSION_ID"): sub_scores for sub_scores in result["sub_scores"]}
+
+
+class ConcentrationScoreTest(unittest.TestCase):
+    def setUp(self):
+        self.df = _events(
+            # Session 1, 100 seconds with every metric
+            (1, 0, "TEXT_SCROLL", {"text_scroll.distance": 250.0, "text_scroll.direction": "down"}),
+            (1, 5, "TEXT_SCROLL", {"text_scroll.distance": 250.0, "text_scroll.direction": "down"}),
+            (1, 10, "TAB_FOCUS_LOST", {}),
+            (1, 30, "TAB_FOCUS_GAIN", {}),
+            (1, 40, "TAB_FOCUS_LOST", {}),
+            # A gain at the same time as the loss does not end it, the next one does
+            (1, 40, "TAB_FOCUS_GAIN", {}),
+            (1, 50, "TAB_FOCUS_GAIN", {}),
+            (1, 60, "VIDEO_PAUSED", {"video_paused.duration": 150.0}),
+            (1, 65, "VIDEO_SPEED_CHANGED", {"video_speed_changed.speed": 1.5}),
+            (1, 70, "WEAK_RSSI", {"weak_rssi.value": -80.0}),
+            (1, 75, "WEARABLE_OFF", {}),
+            (1, 80, "USER_PHYSICAL_ACTIVITY", {"physical.speed": 0.5}),
+            (1, 85, "USER_PHYSICAL_ACTIVITY", {"physical.speed": 2.0}),
+            (1, 90, "VIDEO_JUMP", {}),
+            (1, 100, "VIDEO_JUMP", {}),
+            # Session 2, a loss never regained is a distraction until the session ends
+            (2, 200, "TAB_FOCUS_GAIN", {}),
+            (2, 280, "TAB_FOCUS_LOST", {}),
+            (2, 300, "VIDEO_PERCENTAGE", {}),
+            # Session 3, a single event, its gain must not end session 2's loss
+            (3, 400, "TAB_FOCUS_GAIN", {}),
+        )
+        self.result = get_concentration_score_no_filter(self.df, self.df)
+
+    def test_tab_focus_pairs_each_loss_with_the_next_gain_of_its_session(self):
+        sub_scores = _sub_scores(self.result)
+        # Session 1 lost focus for 20 + 10 of its 100 seconds, session 2 for its last 20
+        self.assertEqual({session_id: scores["TAB_FOCUS"] for session_id, scores in sub_scores.items()},
+                         {1: 0.7, 2: 0.8, 3: 1.0})
+
+    def test_sub_scores(self):
+        sub_scores = _sub_scores(self.result)
+        perfect = dict.fromkeys(METRIC_WEIGHTS, 1.0)
+        expected = {
+            1: {**perfect, "TEXT_SCROLL": 0.15 + 0.85 * 0.5, "VIDEO_PAUSE": 0.5, "VIDEO_SPEED": 0.875,
+                "TAB_FOCUS": 0.7, "PHYSICAL_ACTIVITY": 0.5, "WEAK_SIGNAL": 0.5, "WATCH_OFF": 0.5},
+            # Only session 1 jumped, twice, so the user's average is 2 jumps per session
+            2: {**perfect, "VIDEO_JUMP": 0.0, "TAB_FOCUS": 0.8},
+            3: {**perfect, "VIDEO_JUMP": 0.0},
+        }
+        self.assertEqual(sub_scores.keys(), expected.keys())
+        for session_id, scores in expected.items():
+            for metric, score in scores.items():
+                self.assertAlmostEqual(sub_scores[session_id][metric], score, msg=f"{session_id} {metric}")
+
+    def test_session_scores(self):
+        expected = {1: 0.65375, 2: 1 - 0.15 - 0.15 * 0.2, 3: 0.85}
+        for session_id, score in expected.items():
+            self.assertAlmostEqual(self.result["session_scores"][session_id], score)
+        self.assertAlmostEqual(self.result["concentration_score"], sum(expected.values()) / 3)
+
+    def test_no_events(self):
+        self.assertIsNone(get_concentration_score_no_filter(_events(), _events()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,185 @@
+import asyncio
+import os
+import tempfile
+import unittest
+import warnings
+
+import pandas as pd
+from bson import ObjectId
+
+import dataframeloader
+from metriccalc.sessionlog import get_all_logs_no_filter
+
+
+class DownAPI:
+    """API client whose requests all fail, like `APIClient` does when the API is unreachable."""
+
+    async def get_users(self, query_params: dict | None = None):
+        return None
+
+    async def request(self, method: str = "GET", endpoint: str = "/", headers: dict | None = None,
+                      query: dict | None = None):
+        return None
+
+
+class UnreachableDB:
+    def __getitem__(self, name):
+        raise AssertionError('the reports should not be read when the API is down')
+
+
+class LoadLakeTest(unittest.TestCase):
+    def test_api_down_keeps_current_lake(self):
+        lake = pd.DataFrame({'userId': ['u0']})
+        dataframeloader.lake, dataframeloader.lake_version = lake, 3
+        asyncio.run(dataframeloader.load_lake(api=DownAPI(), db=UnreachableDB()))
+        self.assertIs(dataframeloader.lake, lake)
+        self.assertEqual(dataframeloader.lake_version, 3)
+
+
+def _report(event_type: str, added_ms: int, body: dict) -> dict:
+    return {'userId': 'u0', 'sessionId': 1, 'courseId': 1, 'type': event_type,
+            'device': 'web', 'addedAt': added_ms, 'body': body}
+
+
+class BuildLakeTest(unittest.TestCase):
+    def test_empty_reports_build_an_empty_lake(self):
+        userdf = pd.DataFrame({'user_id': ['u0'], 'name': ['Ana'], 'lastname': ['Diaz']})
+        coursesdf = pd.DataFrame({'course_id': [1], 'title': ['Math'], 'teacher_id': ['t0']})
+        reports = pd.DataFrame(columns=dataframeloader.REPORT_FIELDS)
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', FutureWarning)
+            lake = dataframeloader._build_lake(userdf, coursesdf, reports)
+        self.assertTrue(lake.empty)
+
+    def test_video_speed_renders_as_reported(self):
+        userdf = pd.DataFrame({'user_id': ['u0'], 'name': ['Ana'], 'lastname': ['Diaz']})
+        coursesdf = pd.DataFrame({'course_id': [1], 'title': ['Math'], 'teacher_id': ['t0']})
+        reports = pd.DataFrame([
+            _report('USER_HEARTRATE', 1749999940000, {'heartrate_change': {'value': 72, 'count': 1, 'mean': 72.0}}),
+            _report('USER_PHYSICAL_ACTIVITY', 1749999950000, {'detected_at': 1749999950000, 'speed': 0.2}),
+            _report('VIDEO_PAUSED', 1749999960000, {'timestamp': 1749999960000, 'duration': 4.0}),
+            _report('VIDEO_SPEED_CHANGED', 1750000000000, {'timestamp': 1750000000000, 'speed': 1.3}),
+            _report('VIDEO_SPEED_CHANGED', 1750000060000, {'timestamp': 1750000060000, 'speed': 1.1}),
+        ])
+        lake = dataframeloader._build_lake(userdf, coursesdf, reports)
+        descriptions = [entry['event_description'] for entry in get_all_logs_no_filter(lake)
+                        if entry['event_type'] == 'VIDEO_SPEED_CHANGED']
+        self.assertEqual(descriptions, ['Changed video speed to 1.3x.', 'Changed video speed to 1.1x.'])
+
+
+class ReportsAPI:
+    async def get_users(self, query_params: dict | None = None):
+        return [{'user_id': 'u0', 'name': 'Ana', 'lastname': 'Diaz'},
+                {'user_id': 'u1', 'name': 'Luis', 'lastname': 'Rios'}]
+
+    async def request(self, method: str = "GET", endpoint: str = "/", headers: dict | None = None,
+                      query: dict | None = None):
+        return [{'course_id': 1, 'title': 'Math', 'teacher_id': 't0'}]
+
+
+class ReportsCursor:
+    def __init__(self, docs: list):
+        self.docs = docs
+
+    def batch_size(self, size: int):
+        return self
+
+    async def to_list(self):
+        return self.docs
+
+
+class ReportsCollection:
+    """The subset of PyMongo's AsyncCollection that load_lake reads reports through."""
+
+    def __init__(self, docs: list):
+        self.docs = list(docs)
+
+    def _matching(self, query: dict) -> list:
+        bounds = query.get('_id', {})
+        return [doc for doc in self.docs
+                if ('$gt' not in bounds or doc['_id'] > bounds['$gt'])
+                and ('$lte' not in bounds or doc['_id'] <= bounds['$lte'])]
+
+    async def find_one(self, sort=None, projection=None):
+        return {'_id': max(doc['_id'] for doc in self.docs)} if self.docs else None
+
+    async def estimated_document_count(self):
+        return len(self.docs)
+
+    async def count_documents(self, query: dict):
+        return len(self._matching(query))
+
+    def find(self, query: dict, projection: dict = None):
+        return ReportsCursor([{key: doc[key] for key in ['_id', *projection]} for doc in self._matching(query)])
+
+
+def _heartrate_report(user_id: str, minute: int, mean: float) -> dict:
+    return {'_id': ObjectId(), 'userId': user_id, 'sessionId': 1, 'courseId': 1, 'type': 'USER_HEARTRATE',
+            'device': 'watch', 'addedAt': 1750000000000 + minute * 60_000,
+            'body': {'heartrate_change': {'value': int(mean), 'count': 1, 'mean': mean}}}
+
+
+class IncrementalRefreshTest(unittest.TestCase):
+    def setUp(self):
+        # load_lake writes its Parquet snapshot to the working directory
+        self._cwd = os.getcwd()
+        self._tmp = tempfile.TemporaryDirectory()
+        os.chdir(self._tmp.name)
+        self._reset()
+
+    def tearDown(self):
+        os.chdir(self._cwd)
+        self._tmp.cleanup()
+        self._reset()
+
+    @staticmethod
+    def _reset():
+        dataframeloader.lake = pd.DataFrame()
+        dataframeloader._last_fingerprint = None
+        dataframeloader._last_report_id = None
+        dataframeloader._last_report_count = 0
+
+    def _load(self, collection: ReportsCollection) -> pd.DataFrame:
+        asyncio.run(dataframeloader.load_lake(api=ReportsAPI(), db={'test': {'reports': collection}}))
+        return dataframeloader.lake
+
+    def _assert_matches_full_rebuild(self, refreshed: pd.DataFrame, collection: ReportsCollection):
+        self._reset()
+        pd.testing.assert_frame_equal(refreshed, self._load(ReportsCollection(collection.docs)))
+
+    def test_refresh_with_new_reports_matches_full_rebuild(self):
+        collection = ReportsCollection([_heartrate_report('u0', minute, 70.0 + minute) for minute in range(4)])
+        self._load(collection)
+        collection.docs += [_heartrate_report('u1', 10, 95.5), _heartrate_report('u0', 11, 101.0)]
+        self._assert_matches_full_rebuild(self._load(collection), collection)
+
+    def test_snapshot_reads_back_as_the_served_lake(self):
+        lake = self._load(ReportsCollection([_heartrate_report('u0', minute, 70.0 + minute) for minute in range(4)]))
+        # pandas reads string columns back with its default storage unless told otherwise
+        with pd.option_context('mode.string_storage', 'pyarrow'):
+            snapshot = pd.read_parquet('lake.parquet')
+        pd.testing.assert_frame_equal(snapshot, lake.drop(columns=dataframeloader.BUILD_COLUMNS))
+
+    def test_refresh_without_new_reports_keeps_the_lake(self):
+        collection = ReportsCollection([_heartrate_report('u0', minute, 70.0 + minute) for minute in range(4)])
+        lake = self._load(collection)
+        # The estimated count can move without any report being added
+        count, *rest = dataframeloader._last_fingerprint
+        dataframeloader._last_fingerprint = (count - 1, *rest)
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', FutureWarning)
+            self.assertIs(self._load(collection), lake)
+
+    def test_refresh_after_deletes_and_inserts_matches_full_rebuild(self):
+        collection = ReportsCollection([_heartrate_report('u0', minute, 70.0 + minute) for minute in range(4)])
+        self._load(collection)
+        # As many reports inserted as deleted, so the document count does not drop
+        del collection.docs[1]
+        collection.docs.append(_heartrate_report('u1', 10, 95.5))
+        refreshed = self._load(collection)
+        self.assertNotIn(71.0, refreshed['heartrate_change.mean'].tolist())
+        self._assert_matches_full_rebuild(refreshed, collection)
+
+
+if __name__ == "__main__":
+    unittest.main()
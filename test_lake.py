@@ -7,10 +7,10 @@ full FastAPI server. It's useful for debugging and testing the data lake loading
 """
 
 import asyncio
-import time
 from datetime import datetime, timedelta
 import pandas as pd
-from dataframeloader import load_lake, lake
+import dataframeloader as df_loader
+from dataframeloader import load_lake
 from apiClient import APIClient
 from db import get_database
 import os
@@ -46,40 +46,35 @@ async def test_lake_loading():
 
     # Initial lake load
     print(f"[{datetime.now().isoformat()}] Performing initial lake load...")
-    success = await load_lake(api=api_client, db=mongo_client)
+    await load_lake(api=api_client, db=mongo_client)
 
-    if not success:
+    # load_lake publishes a new frame on the module, so read it from there
+    if df_loader.lake.empty:
         print("Error: Failed to load lake")
         return
 
-    print(f"[{datetime.now().isoformat()}] Initial lake load complete with {len(lake)} rows")
+    print(f"[{datetime.now().isoformat()}] Initial lake load complete with {len(df_loader.lake)} rows")
 
-    # Run periodic refreshes
-    start_time = time.time()
-    last_refresh_time = start_time
+    # Refresh in a background task that sleeps a whole interval between refreshes,
+    # while this task just waits for the test to end
+    refresh_task = asyncio.create_task(_refresher(api_client, mongo_client))
+    await asyncio.sleep(TEST_DURATION)
+    refresh_task.cancel()
+    try:
+        await refresh_task
+    except asyncio.CancelledError:
+        pass
 
-    while time.time() - start_time < TEST_DURATION:
-        current_time = time.time()
-
-        # Check if it's time to refresh
-        if current_time - last_refresh_time >= REFRESH_INTERVAL:
-            print(f"[{datetime.now().isoformat()}] Refreshing data lake...")
-            await load_lake(api=api_client, db=mongo_client)
-            last_refresh_time = current_time
-            print(f"[{datetime.now().isoformat()}] Lake refresh complete with {len(lake)} rows")
-
-        # Wait a bit before checking again
-        await asyncio.sleep(5)
-
-        # Print status
-        elapsed = time.time() - start_time
-        remaining = TEST_DURATION - elapsed
-        next_refresh = REFRESH_INTERVAL - (time.time() - last_refresh_time)
+    print(f"[{datetime.now().isoformat()}] Test complete after {TEST_DURATION} seconds")
 
-        print(f"Test running for {elapsed:.1f}s (remaining: {remaining:.1f}s), "
-              f"next refresh in {next_refresh:.1f}s")
 
-    print(f"[{datetime.now().isoformat()}] Test complete after {TEST_DURATION} seconds")
+async def _refresher(api_client: APIClient, mongo_client):
+    """Reloads the lake every REFRESH_INTERVAL seconds until cancelled."""
+    while True:
+        await asyncio.sleep(REFRESH_INTERVAL)
+        print(f"[{datetime.now().isoformat()}] Refreshing data lake...")
+        await load_lake(api=api_client, db=mongo_client)
+        print(f"[{datetime.now().isoformat()}] Lake refresh complete with {len(df_loader.lake)} rows")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,49 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from metriccalc.sessionlog import get_all_logs_no_filter
+
+
+def _speed_changes(speeds: list, dtype: str) -> pd.DataFrame:
+    """One session of VIDEO_SPEED_CHANGED rows, a minute apart."""
+    return pd.DataFrame({
+        "name": "Ana",
+        "sessionId": 1,
+        "type": "VIDEO_SPEED_CHANGED",
+        "addedAt": pd.date_range("2025-06-23 10:00", periods=len(speeds), freq="min", tz="America/Bogota"),
+        "heartrate_change.mean": np.nan,
+        "physical.speed": np.nan,
+        "video_paused.duration": np.nan,
+        "video_speed_changed.speed": np.array(speeds, dtype=dtype),
+    })
+
+
+def _speed_descriptions(df: pd.DataFrame) -> list:
+    return [entry["event_description"] for entry in get_all_logs_no_filter(df)
+            if entry["event_type"] == "VIDEO_SPEED_CHANGED"]
+
+
+class VideoSpeedLogTest(unittest.TestCase):
+    def test_float32_speed_renders_shortest_repr(self):
+        self.assertEqual(
+            _speed_descriptions(_speed_changes([1.3, 1.1, 2.0], "float32")),
+            ["Changed video speed to 1.3x.", "Changed video speed to 1.1x.", "Changed video speed to 2.0x."],
+        )
+
+    def test_float64_speed_renders_as_reported(self):
+        self.assertEqual(
+            _speed_descriptions(_speed_changes([1.3, 0.5], "float64")),
+            ["Changed video speed to 1.3x.", "Changed video speed to 0.5x."],
+        )
+
+    def test_missing_speed_renders_without_value(self):
+        self.assertEqual(
+            _speed_descriptions(_speed_changes([np.nan, 1.5], "float32")),
+            ["Changed video speed.", "Changed video speed to 1.5x."],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import math
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from metriccalc.stress import _clamp, stress_score_
+
+START = pd.Timestamp("2025-06-23 10:00", tz="America/Bogota")
+COLUMNS = ["heartrate_change.mean", "physical.speed", "text_scroll.distance"]
+
+
+def _events(*events: tuple) -> pd.DataFrame:
+    """Rows from (session, minute, type, {column: value}) tuples, metric columns NaN unless given."""
+    return pd.DataFrame([
+        {"sessionId": session, "addedAt": START + pd.Timedelta(minutes=minute), "type": event_type,
+         **dict.fromkeys(COLUMNS, np.nan), **values}
+        for session, minute, event_type, values in events
+    ], columns=["sessionId", "addedAt", "type", *COLUMNS])
+
+
+def _sessions(result: dict) -> dict:
+    return {sub_stress["session_id"]: sub_stress for sub_stress in result["sub_stress"]}
+
+
+class ClampTest(unittest.TestCase):
+    def test_clamps_and_maps_nan_to_upper_bound(self):
+        np.testing.assert_array_equal(_clamp(np.array([np.nan, -1.0, 0.5, 2.0])), [1.0, 0.0, 0.5, 1.0])
+
+
+class StressScoreTest(unittest.TestCase):
+    def test_scores_every_metric_of_a_session(self):
+        result = stress_score_(_events(
+            (1, 0, "USER_HEARTRATE", {"heartrate_change.mean": 90.0}),
+            (1, 1, "USER_HEARTRATE", {"heartrate_change.mean": np.nan}),
+            (1, 2, "USER_HEARTRATE", {"heartrate_change.mean": 100.0}),
+            (1, 3, "USER_PHYSICAL_ACTIVITY", {"physical.speed": 0.5}),
+            (1, 4, "USER_PHYSICAL_ACTIVITY", {"physical.speed": 2.0}),
+            (1, 5, "TEXT_SCROLL", {"text_scroll.distance": 100.0}),
+            (1, 6, "TEXT_SCROLL", {"text_scroll.distance": 300.0}),
+            (1, 7, "VIDEO_JUMP", {}),
+            (1, 8, "VIDEO_JUMP", {}),
+            (1, 8, "VIDEO_JUMP", {}),
+            (1, 9, "TAB_FOCUS_LOST", {}),
+            (1, 10, "TAB_FOCUS_LOST", {}),
+        ))
+        session = _sessions(result)[1]
+        # NaN heart rates are skipped: (95 - 75) / (110 - 75)
+        self.assertAlmostEqual(session["HEARTRATE"], 20 / 35)
+        self.assertAlmostEqual(session["ACTIVITY"], 0.5)
+        # CV of [100, 300] over 1.5
+        self.assertAlmostEqual(session["SCROLLING"], math.sqrt(2) / 2 / 1.5)
+        # 3 jumps and 2 losses in 10 minutes
+        self.assertAlmostEqual(session["JUMPING"], 0.3 / 1.5)
+        self.assertAlmostEqual(session["FOCUS_LOSS"], 0.2)
+        expected = 0.40 * 20 / 35 + 0.15 * 0.5 + 0.15 * math.sqrt(2) / 2 / 1.5 + 0.10 * 0.2 + 0.20 * 0.2
+        self.assertAlmostEqual(session["stress_level"], expected)
+        self.assertAlmostEqual(result["stress"], expected)
+
+    def test_only_nan_heart_rates_are_max_stress(self):
+        session = _sessions(stress_score_(_events(
+            (1, 0, "USER_HEARTRATE", {"heartrate_change.mean": np.nan}),
+            (1, 5, "USER_HEARTRATE", {"heartrate_change.mean": np.nan}),
+        )))[1]
+        self.assertEqual(session["HEARTRATE"], 1.0)
+        self.assertAlmostEqual(session["stress_level"], 0.40)
+
+    def test_single_event_session_is_calm(self):
+        result = stress_score_(_events(
+            (1, 0, "TAB_FOCUS_LOST", {}),
+            (2, 30, "USER_HEARTRATE", {"heartrate_change.mean": 110.0}),
+            (2, 40, "TAB_FOCUS_LOST", {}),
+        ))
+        sessions = _sessions(result)
+        self.assertEqual(sessions[1]["stress_level"], 0.0)
+        self.assertAlmostEqual(sessions[2]["stress_level"], 0.40 + 0.20 * 0.1)
+        self.assertAlmostEqual(result["stress"], (0.40 + 0.20 * 0.1) / 2)
+
+    def test_no_events(self):
+        self.assertEqual(stress_score_(_events()), {"stress": 0.0, "sub_stress": []})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,28 @@
+import unittest
+
+import pandas as pd
+
+from utils import parse_date, parse_dates
+
+
+class ParseDatesTest(unittest.TestCase):
+    def test_mixed_iso_strings_parse_like_parse_date(self):
+        dates = pd.Series([
+            '2025-06-23T05:04:03+00:00',
+            '2025-06-23T05:04:03.228000+00:00',
+            '2025-06-23T05:04:03Z',
+            '2025-06-23T00:04:03-05:00',
+            '2025-06-23',
+            1750655043228,
+        ], dtype=object)
+        expected = [parse_date(date) for date in dates]
+        self.assertEqual(parse_dates(dates).tolist(), expected)
+
+    def test_non_iso_strings_parse_like_parse_date(self):
+        dates = pd.Series(['2025-06-23T05:04:03Z', '06/23/2025 10:00'], dtype=object)
+        expected = [parse_date(date) for date in dates]
+        self.assertEqual(parse_dates(dates).tolist(), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,100 +1,350 @@
+from functools import lru_cache
+from typing import Callable
+
+import numpy as np
 import pandas as pd
 
+# Name of the lake's index, a copy of `userId` kept sorted by load_lake.
+USER_INDEX = "user_key"
+# Lake column holding `addedAt` as int64 Unix nanoseconds, for integer time arithmetic.
+ADDED_NS = "_added_ns"
+
+
+def _is_lake_indexed(df: pd.DataFrame) -> bool:
+    """Whether `df` is indexed like the lake: sorted by user, and by time within a user."""
+    return df.index.name == USER_INDEX and df.index.is_monotonic_increasing
+
+
+def _user_rows(df: pd.DataFrame, user_id: str) -> pd.DataFrame:
+    """
+    Returns the rows of `user_id`. On a frame indexed like the lake this is an O(log n) slice,
+    anything else falls back to a boolean mask.
+    """
+    if _is_lake_indexed(df):
+        return df.loc[user_id:user_id]
+    return df[df["userId"] == user_id]
+
+
+def _added_ns(df: pd.DataFrame) -> np.ndarray:
+    """`addedAt` as int64 Unix nanoseconds, read from the lake's ADDED_NS column when present."""
+    if ADDED_NS in df.columns:
+        return df[ADDED_NS].to_numpy()
+    return df["addedAt"].to_numpy("datetime64[ns]").view("int64")
+
+
+def _type_codes(df: pd.DataFrame) -> tuple[np.ndarray, dict[str, int]]:
+    """
+    Integer code of every row's event type and the type -> code mapping, so type checks compare ints.
+    The lake stores `type` as a categorical and its codes are reused, anything else is factorized.
+    """
+    if isinstance(df["type"].dtype, pd.CategoricalDtype):
+        codes, types = df["type"].cat.codes.to_numpy(), df["type"].cat.categories
+    else:
+        codes, types = pd.factorize(df["type"])
+    return codes, {event_type: code for code, event_type in enumerate(types)}
+
+
+def _session_codes(df: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Sorted session ids of `df` and every row's session number (its index into them), from one hash
+    factorize of `sessionId`, so only the distinct ids get sorted. Rows without a session get -1.
+    """
+    session_of_row, session_ids = pd.factorize(df["sessionId"], sort=True)
+    return np.asarray(session_ids), session_of_row
+
+
+def _type_rows(df: pd.DataFrame) -> dict[str, np.ndarray]:
+    """Sorted row positions of every event type in `df`, from one stable argsort of the type codes."""
+    codes, type_code = _type_codes(df)
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(len(type_code) + 1))
+    return {event_type: order[bounds[code]:bounds[code + 1]] for event_type, code in type_code.items()}
+
+
+def _user_type_rows(
+        df: pd.DataFrame, type_rows: dict[str, np.ndarray], user_id: str, event_type: str
+) -> np.ndarray:
+    """
+    Positions within `_user_rows(df, user_id)` of the user's `event_type` rows, read from the
+    `_type_rows(df)` sidecar. `df` must be indexed like the lake.
+    """
+    start = df.index.searchsorted(user_id, side="left")
+    stop = df.index.searchsorted(user_id, side="right")
+    rows = type_rows.get(event_type, np.empty(0, dtype=np.intp))
+    return rows[np.searchsorted(rows, start):np.searchsorted(rows, stop)] - start
+
+
 def _filter_data(
-        df: pd.DataFrame, user_id: str, start_date: str, end_date: str
+        df: pd.DataFrame, user_id: str, start: pd.Timestamp, end: pd.Timestamp
 ) -> pd.DataFrame:
-    """Helper function to filter by user and INCLUSIVE date range."""
-    # Use your parser to create timezone-aware start/end datetimes
-    start = parse_date(start_date)
+    """Helper function to filter by user and INCLUSIVE date range, from already parsed dates."""
     # Add one day to the end date to make the range inclusive
-    end = parse_date(end_date) + pd.Timedelta(days=1)
+    end = end + pd.Timedelta(days=1)
 
+    user_df = _user_rows(df, user_id)
+    if _is_lake_indexed(df):
+        # The lake keeps each user's rows sorted by time, so the date range is a slice of them
+        lo, hi = np.searchsorted(_added_ns(user_df), [start.value, end.value])
+        user_df = user_df.iloc[lo:hi]
+        return user_df[user_df["user_id"] == user_id]
     mask = (
-            (df["user_id"] == user_id)
-            & (df["addedAt"] >= start)
-            & (df["addedAt"] < end)
+            (user_df["user_id"] == user_id)
+            & (user_df["addedAt"] >= start)
+            & (user_df["addedAt"] < end)
     )
-    return df[mask]
+    return user_df[mask]
+
+
+@lru_cache(maxsize=65536)
+def _parse_date_str(date: str) -> pd.Timestamp:
+    # Naive strings are read as UTC, like pd.to_datetime(date, utc=True)
+    timestamp = pd.Timestamp(date)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.tz_localize('UTC')
+    return timestamp.tz_convert('America/Bogota').as_unit('ns')
+
+
+@lru_cache(maxsize=65536)
+def _parse_date_ms(date: int) -> pd.Timestamp:
+    return pd.Timestamp(date, unit='ms', tz='UTC').tz_convert('America/Bogota').as_unit('ns')
 
 
 def parse_date(date: str | int) -> pd.Timestamp:
     """
     Parses a date string or integer (timestamp) into a [pandas] Timestamp.
     Handles both string and integer inputs, if the input is a str it will adjust for time zone -5 (America/Bogota).
+    The same dates repeat a lot, so parsed values are cached per input.
     """
     if isinstance(date, str):
-        return pd.to_datetime(date, utc=True).tz_convert('America/Bogota')
+        return _parse_date_str(date)
     elif isinstance(date, int):
-        return pd.to_datetime(date, unit='ms', utc=True).tz_convert('America/Bogota')
+        return _parse_date_ms(date)
     else:
         raise ValueError("Date must be a string or an integer (timestamp).")
 
 
-def parse_body(body:dict, event_type :str) -> pd.Series:
+def parse_dates(dates: pd.Series) -> pd.Series:
+    """
+    Vectorized counterpart of `parse_date` for a whole column.
+    Numbers are read as Unix milliseconds and anything else is parsed as a date string, both end up in America/Bogota.
+    """
+    numeric = pd.to_numeric(dates, errors='coerce')
+    is_ms = numeric.notna()
+    # Integer milliseconds like `parse_date`, pandas' float path rounds through numpy and can raise spuriously.
+    parsed = pd.to_datetime(numeric.where(is_ms, 0).astype('int64'), unit='ms', utc=True).where(is_ms)
+    if not is_ms.all():
+        parsed = parsed.where(is_ms, _parse_date_strs(dates.where(~is_ms)))
+    return parsed.dt.tz_convert('America/Bogota')
+
 
-    if event_type is None: return pd.Series()
+def _parse_date_strs(dates: pd.Series) -> pd.Series:
+    """
+    Date strings to UTC. Every value is parsed on its own like in `parse_date`, so a column can
+    mix ISO variants (fractional seconds, `Z` or `+00:00`); non-ISO strings fall back to per-value inference.
+    """
+    try:
+        return pd.to_datetime(dates, utc=True, format='ISO8601')
+    except ValueError:
+        return pd.to_datetime(dates, utc=True, format='mixed')
 
-    if event_type == "USER_HEARTRATE": return pd.Series({
+
+# Body field -> lake column, per event type.
+# Mirrors the per-type branches of parse_body.
+BODY_COLUMNS = {
+    "USER_HEARTRATE": {
+        "value": "heartrate_change.value",
+        "count": "heartrate_change.count",
+        "mean": "heartrate_change.mean",
+    },
+    "USER_PHYSICAL_ACTIVITY": {
+        "detected_at": "physical.detected_at",
+        "speed": "physical.speed",
+    },
+    "WEAK_RSSI": {"rssi": "weak_rssi.value"},
+    "WEARABLE_OFF": {"time": "wearable_off.at"},
+    "TEXT_SCROLL": {
+        "scroll_direction": "text_scroll.direction",
+        "scroll_distance": "text_scroll.distance",
+        "current_scroll_position": "text_scroll.position",
+        "timestamp": "text_scroll.time",
+    },
+    "TAB_FOCUS_GAIN": {"timestamp": "focus_gain.time"},
+    "TAB_FOCUS_LOST": {"timestamp": "focus_lost.time"},
+    "UNPIN_SCREEN": {"removed_at": "unpin_screen.at"},
+    "VIDEO_PAUSED": {
+        "timestamp": "video_paused.at",
+        "duration": "video_paused.duration",
+    },
+    "VIDEO_JUMP": {
+        "timestamp": "video_jump.at",
+        "jump_to": "video_jump.to",
+        "direction": "video_jump.direction",
+    },
+    "VIDEO_SPEED_CHANGED": {
+        "timestamp": "video_speed_changed.at",
+        "speed": "video_speed_changed.speed",
+    },
+    "VIDEO_PERCENTAGE": {
+        "timestamp": "video_percentage.at",
+        "percentage": "video_percentage.percentage",
+    },
+}
+
+# Event types whose fields are nested one level down, under this body key.
+NESTED_BODY_KEY = {"USER_HEARTRATE": "heartrate_change"}
+
+# Lake columns that hold a timestamp and go through parse_dates.
+DATE_COLUMNS = {
+    'physical.detected_at', 'wearable_off.at', 'text_scroll.time', 'focus_gain.time',
+    'focus_lost.time', 'unpin_screen.at', 'video_paused.at', 'video_jump.at',
+    'video_speed_changed.at', 'video_percentage.at',
+}
+
+
+def _body_extractor(event_type: str) -> Callable[[pd.Series], pd.DataFrame]:
+    """
+    Extractor of the bodies of one event type: reads its fixed fields straight into lake columns,
+    instead of going through json_normalize's generic flattening.
+    """
+    columns = BODY_COLUMNS[event_type]
+    fields = tuple(columns)
+    nested_key = NESTED_BODY_KEY.get(event_type)
+    date_columns = DATE_COLUMNS.intersection(columns.values())
+
+    def extract(bodies: pd.Series) -> pd.DataFrame:
+        records = bodies.tolist()
+        if nested_key:
+            records = [body.get(nested_key) or {} for body in records]
+        parsed = (pd.DataFrame.from_records(records, columns=fields, index=bodies.index)
+                  .rename(columns=columns))
+        for column in date_columns:
+            parsed[column] = parse_dates(parsed[column])
+        return parsed
+
+    return extract
+
+
+# Event type -> extractor of its bodies, see parse_bodies.
+BODY_EXTRACTORS = {event_type: _body_extractor(event_type) for event_type in BODY_COLUMNS}
+
+
+def parse_bodies(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Vectorized counterpart of `parse_body` for the `body` column of a whole frame.
+    Bodies are flattened one frame per event type instead of one parse_body call per row.
+    """
+    parts = []
+    for event_type, sub in df.groupby('type', sort=False):
+        extract = BODY_EXTRACTORS.get(event_type)
+        if extract is None:
+            parts.append(pd.DataFrame({'other_type': event_type}, index=sub.index))
+            continue
+        parts.append(extract(sub['body']))
+
+    if not parts:
+        return pd.DataFrame(index=df.index)
+    return pd.concat(parts).reindex(df.index)
+
+
+def _heartrate(body: dict) -> dict:
+    return {
         'heartrate_change.value': body['heartrate_change']['value'],
         'heartrate_change.count': body['heartrate_change']['count'],
-        'heartrate_change.mean': body['heartrate_change']['mean']
-    })
+        'heartrate_change.mean': body['heartrate_change']['mean'],
+    }
+
 
-    if event_type == "USER_PHYSICAL_ACTIVITY": return pd.Series({
+def _physical_activity(body: dict) -> dict:
+    return {
         'physical.detected_at': parse_date(body['detected_at']),
         'physical.speed': body['speed'],
-    })
-    if event_type == "WEAK_RSSI": return pd.Series({
-        "weak_rssi.value": body['rssi']
-    })
+    }
+
+
+def _weak_rssi(body: dict) -> dict:
+    return {"weak_rssi.value": body['rssi']}
+
 
-    if event_type == "WEARABLE_OFF": return pd.Series({
-        "wearable_off.at": parse_date(body['time'])
-    })
+def _wearable_off(body: dict) -> dict:
+    return {"wearable_off.at": parse_date(body['time'])}
 
-    if event_type == "TEXT_SCROLL": return pd.Series({
+
+def _text_scroll(body: dict) -> dict:
+    return {
         "text_scroll.direction": body['scroll_direction'],
         "text_scroll.distance": body['scroll_distance'],
         "text_scroll.position": body['current_scroll_position'],
-        "text_scroll.time": parse_date(body['timestamp'])
-    })
+        "text_scroll.time": parse_date(body['timestamp']),
+    }
+
+
+def _tab_focus_gain(body: dict) -> dict:
+    return {"focus_gain.time": parse_date(body['timestamp'])}
+
 
-    if event_type == "TAB_FOCUS_GAIN": return pd.Series({
-        "focus_gain.time": parse_date(body['timestamp']),
-    })
+def _tab_focus_lost(body: dict) -> dict:
+    return {"focus_lost.time": parse_date(body['timestamp'])}
 
-    if event_type == "TAB_FOCUS_LOST": return pd.Series({
-        "focus_lost.time": parse_date(body['timestamp']),
-    })
 
-    if event_type == "UNPIN_SCREEN":return pd.Series({
-        "unpin_screen.at": parse_date(body['removed_at']),
-    })
+def _unpin_screen(body: dict) -> dict:
+    return {"unpin_screen.at": parse_date(body['removed_at'])}
 
-    if event_type == "VIDEO_PAUSED": return pd.Series({
+
+def _video_paused(body: dict) -> dict:
+    return {
         "video_paused.at": parse_date(body['timestamp']),
         "video_paused.duration": body['duration'],
-    })
+    }
+
 
-    if event_type == "VIDEO_JUMP": return pd.Series({
+def _video_jump(body: dict) -> dict:
+    return {
         "video_jump.at": parse_date(body['timestamp']),
         "video_jump.to": body['jump_to'],
         "video_jump.direction": body['direction'],
-    })
+    }
 
-    if event_type == "VIDEO_SPEED_CHANGED": return pd.Series({
+
+def _video_speed_changed(body: dict) -> dict:
+    return {
         "video_speed_changed.at": parse_date(body['timestamp']),
         "video_speed_changed.speed": body['speed'],
-    })
+    }
+
 
-    if event_type == "VIDEO_PERCENTAGE": return pd.Series({
+def _video_percentage(body: dict) -> dict:
+    return {
         "video_percentage.at": parse_date(body['timestamp']),
         "video_percentage.percentage": body['percentage'],
-    })
+    }
 
-    return pd.Series({
-        'other_type': event_type
-    })
 
+# Event type -> handler flattening one body of that type into lake columns.
+_HANDLERS: dict[str, Callable[[dict], dict]] = {
+    "USER_HEARTRATE": _heartrate,
+    "USER_PHYSICAL_ACTIVITY": _physical_activity,
+    "WEAK_RSSI": _weak_rssi,
+    "WEARABLE_OFF": _wearable_off,
+    "TEXT_SCROLL": _text_scroll,
+    "TAB_FOCUS_GAIN": _tab_focus_gain,
+    "TAB_FOCUS_LOST": _tab_focus_lost,
+    "UNPIN_SCREEN": _unpin_screen,
+    "VIDEO_PAUSED": _video_paused,
+    "VIDEO_JUMP": _video_jump,
+    "VIDEO_SPEED_CHANGED": _video_speed_changed,
+    "VIDEO_PERCENTAGE": _video_percentage,
+}
+
+
+def parse_body(body:dict, event_type :str) -> dict:
+    """
+    Flattens one report body into its lake columns, as a plain dict.
+    Build frames from many of them at once with pd.DataFrame.from_records, or use parse_bodies.
+    """
 
+    if event_type is None: return {}
 
+    handler = _HANDLERS.get(event_type)
+    if handler is None:
+        return {'other_type': event_type}
+    return handler(body)